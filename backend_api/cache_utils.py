@@ -17,18 +17,63 @@ Usage:
 
     # Clear all
     device_cache.clear()
+
+Cached values should be already-parsed dicts. Use json_loads() (orjson when
+installed, stdlib json otherwise) to decode JSON columns on a cache miss.
 """
 
 import time
 import threading
 import logging
-from typing import Optional, Dict, Any
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Tuple
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    import json
+    ORJSON_AVAILABLE = False
 
 logger = logging.getLogger('nanohub_cache')
 
 
+def json_loads(raw):
+    """Parse JSON str/bytes, using orjson when available."""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+class _CacheShard:
+    """Single cache partition with its own lock, entries and counters."""
+
+    __slots__ = ('lock', 'data', 'generation', 'hits', 'misses')
+
+    def __init__(self):
+        # Plain (non-reentrant) lock: cache methods never call each other
+        # while holding a shard lock, so RLock bookkeeping is not needed
+        self.lock = threading.Lock()
+        # Entries are (expires_at, data) tuples - much smaller than a dict envelope
+        self.data: 'OrderedDict[str, Tuple[float, Dict[str, Any]]]' = OrderedDict()
+        # Cache generation this shard's entries belong to (see invalidate_all)
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+
+
 class DeviceCache:
-    """Thread-safe in-memory cache for processed device data."""
+    """Thread-safe in-memory cache for processed device data.
+
+    Entries are spread over a fixed number of shards (by hash of the key),
+    each guarded by its own lock, so workers touching unrelated devices
+    don't serialize on a single global lock. Every shard keeps its entries
+    in LRU order, so eviction is O(1). invalidate_all() only bumps a
+    generation counter; each shard drops its stale entries the next time
+    it is locked.
+    """
+
+    NUM_SHARDS = 16  # Must be a power of two (shard index uses a bit mask)
 
     def __init__(self, default_ttl: int = 60, max_size: int = 2000):
         """
@@ -38,12 +83,24 @@ class DeviceCache:
             default_ttl: Default time-to-live in seconds (60s default)
             max_size: Maximum number of entries (prevents memory bloat)
         """
-        self._cache: Dict[str, Dict[str, Any]] = {}
-        self._lock = threading.RLock()
+        self._shards = [_CacheShard() for _ in range(self.NUM_SHARDS)]
+        self._shard_mask = self.NUM_SHARDS - 1
         self._default_ttl = default_ttl
         self._max_size = max_size
-        self._hits = 0
-        self._misses = 0
+        # Size limit is enforced per shard, so the global limit is approximate
+        self._shard_max_size = max(1, max_size // self.NUM_SHARDS)
+        self._generation = 0
+
+    def _shard(self, uuid: str) -> _CacheShard:
+        """Return shard responsible for given key."""
+        return self._shards[hash(uuid) & self._shard_mask]
+
+    def _sweep(self, shard: _CacheShard) -> None:
+        """Drop shard entries from before the last invalidate_all (caller holds shard lock)."""
+        generation = self._generation
+        if shard.generation != generation:
+            shard.data.clear()
+            shard.generation = generation
 
     def get(self, uuid: str) -> Optional[Dict[str, Any]]:
         """
@@ -55,20 +112,25 @@ class DeviceCache:
         Returns:
             Cached data dict or None if not found/expired
         """
-        with self._lock:
-            entry = self._cache.get(uuid)
+        shard = self._shard(uuid)
+        with shard.lock:
+            self._sweep(shard)
+            entry = shard.data.get(uuid)
             if entry is None:
-                self._misses += 1
+                shard.misses += 1
                 return None
 
-            # Check expiry
-            if time.time() > entry['expires_at']:
-                del self._cache[uuid]
-                self._misses += 1
+            expires_at, data = entry
+
+            # Check expiry (monotonic clock - immune to wall-clock steps)
+            if time.monotonic() > expires_at:
+                del shard.data[uuid]
+                shard.misses += 1
                 return None
 
-            self._hits += 1
-            return entry['data']
+            shard.data.move_to_end(uuid)
+            shard.hits += 1
+            return data
 
     def set(self, uuid: str, data: Dict[str, Any], ttl: int = None) -> None:
         """
@@ -79,16 +141,16 @@ class DeviceCache:
             data: Processed data dict
             ttl: Optional custom TTL in seconds
         """
-        with self._lock:
-            # Evict oldest entries if at max size
-            if len(self._cache) >= self._max_size:
-                self._evict_oldest(count=self._max_size // 10)
+        expires_at = time.monotonic() + (ttl or self._default_ttl)
+        shard = self._shard(uuid)
+        with shard.lock:
+            self._sweep(shard)
+            shard.data[uuid] = (expires_at, data)
+            shard.data.move_to_end(uuid)
 
-            self._cache[uuid] = {
-                'data': data,
-                'expires_at': time.time() + (ttl or self._default_ttl),
-                'created_at': time.time()
-            }
+            # Evict least recently used entries if shard is over max size
+            while len(shard.data) > self._shard_max_size:
+                shard.data.popitem(last=False)
 
     def invalidate(self, uuid: str) -> bool:
         """
@@ -100,9 +162,11 @@ class DeviceCache:
         Returns:
             True if entry was removed, False if not found
         """
-        with self._lock:
-            if uuid in self._cache:
-                del self._cache[uuid]
+        shard = self._shard(uuid)
+        with shard.lock:
+            self._sweep(shard)
+            if uuid in shard.data:
+                del shard.data[uuid]
                 logger.debug(f"Cache invalidated for {uuid[:8]}...")
                 return True
             return False
@@ -111,49 +175,44 @@ class DeviceCache:
         """
         Clear entire cache.
 
+        O(1): bumps the cache generation, shards discard their entries lazily.
+
         Returns:
-            Number of entries cleared
+            Number of entries cleared (approximate under concurrent writes)
         """
-        with self._lock:
-            count = len(self._cache)
-            self._cache.clear()
-            logger.info(f"Cache cleared: {count} entries")
-            return count
+        generation = self._generation
+        count = sum(len(shard.data) for shard in self._shards
+                    if shard.generation == generation)
+        self._generation = generation + 1
+        logger.info(f"Cache cleared: {count} entries")
+        return count
 
     def clear(self) -> int:
         """Alias for invalidate_all()."""
         return self.invalidate_all()
 
-    def _evict_oldest(self, count: int = 100) -> None:
-        """Remove oldest entries from cache."""
-        if not self._cache:
-            return
-
-        # Sort by created_at and remove oldest
-        sorted_keys = sorted(
-            self._cache.keys(),
-            key=lambda k: self._cache[k].get('created_at', 0)
-        )
-
-        for key in sorted_keys[:count]:
-            del self._cache[key]
-
-        logger.debug(f"Evicted {count} oldest cache entries")
-
     def get_stats(self) -> Dict[str, Any]:
         """Get cache statistics."""
-        with self._lock:
-            total_requests = self._hits + self._misses
-            hit_rate = (self._hits / total_requests * 100) if total_requests > 0 else 0
-
-            return {
-                'size': len(self._cache),
-                'max_size': self._max_size,
-                'ttl': self._default_ttl,
-                'hits': self._hits,
-                'misses': self._misses,
-                'hit_rate': f"{hit_rate:.1f}%"
-            }
+        size = hits = misses = 0
+        for shard in self._shards:
+            with shard.lock:
+                self._sweep(shard)
+                size += len(shard.data)
+                hits += shard.hits
+                misses += shard.misses
+
+        total_requests = hits + misses
+        hit_rate = (hits / total_requests * 100) if total_requests > 0 else 0
+
+        return {
+            'size': size,
+            'max_size': self._max_size,
+            'ttl': self._default_ttl,
+            'shards': self.NUM_SHARDS,
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': f"{hit_rate:.1f}%"
+        }
 
     def get_multi(self, uuids: list) -> Dict[str, Optional[Dict[str, Any]]]:
         """
@@ -165,9 +224,30 @@ class DeviceCache:
         Returns:
             Dict mapping uuid -> cached data (or None if not cached)
         """
-        result = {}
-        for uuid in uuids:
-            result[uuid] = self.get(uuid)
+        result = dict.fromkeys(uuids)
+
+        # Group keys by shard so every shard lock is taken only once
+        by_shard: Dict[int, list] = {}
+        for uuid in result:
+            by_shard.setdefault(hash(uuid) & self._shard_mask, []).append(uuid)
+
+        now = time.monotonic()
+        for index, keys in by_shard.items():
+            shard = self._shards[index]
+            with shard.lock:
+                self._sweep(shard)
+                data = shard.data
+                for uuid in keys:
+                    entry = data.get(uuid)
+                    if entry is None:
+                        shard.misses += 1
+                    elif now > entry[0]:
+                        del data[uuid]
+                        shard.misses += 1
+                    else:
+                        data.move_to_end(uuid)
+                        shard.hits += 1
+                        result[uuid] = entry[1]
         return result
 
     def set_multi(self, data_dict: Dict[str, Dict[str, Any]], ttl: int = None) -> None:
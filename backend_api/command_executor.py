@@ -27,16 +27,43 @@ import re
 import subprocess
 import logging
 import base64
-import urllib.request
-import urllib.error
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import List, Dict, Any, Optional, Tuple, Callable
+import select
+import threading
+import time
+import http.client
+from urllib.parse import urlsplit
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import List, Dict, Any, Optional, Tuple, Callable, Union
 from dataclasses import dataclass
 
 from config import Config
 
 logger = logging.getLogger('nanohub_executor')
 
+# Patterns for extracting command_uuid from script/API output
+_UUID_PATTERN = r'[a-f0-9]{8}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{12}'
+_RE_COMMAND_UUID = re.compile(
+    r'"command_uuid"\s*:\s*"(?P<json>[a-f0-9-]+)"'               # JSON: "command_uuid": "xxx"
+    r'|command_uuid["\s:]+(?P<kw>' + _UUID_PATTERN + ')'          # UUID after command_uuid keyword
+    r'|Command\s+UUID:\s*(?P<label>' + _UUID_PATTERN + ')',       # "Command UUID:" from shell scripts
+    re.IGNORECASE
+)
+
+# Per-thread keep-alive connections to the MDM API (http.client is not thread-safe)
+_http_local = threading.local()
+
+# Methods safe to resend when the connection drops after the request was sent
+_IDEMPOTENT_METHODS = frozenset(('GET', 'HEAD', 'OPTIONS'))
+
+
+def _is_stale(sock) -> bool:
+    """Check idle keep-alive socket - readable means the server closed it (EOF)."""
+    try:
+        readable, _, _ = select.select([sock], [], [], 0)
+    except (OSError, ValueError):
+        return True
+    return bool(readable)
+
 
 @dataclass
 class CommandResult:
@@ -66,6 +93,12 @@ class CommandExecutor:
     # Characters to strip from parameters (prevent command injection)
     DANGEROUS_CHARS = ['`', '$', '|', '&', ';', '\n', '\r', '>', '<', '\\', '(', ')', '{', '}']
 
+    # Translation table deleting all DANGEROUS_CHARS in a single pass
+    _STRIP_TABLE = str.maketrans('', '', ''.join(DANGEROUS_CHARS))
+
+    # Seconds a failed script lookup is remembered (scripts deployed later are found after this)
+    MISSING_SCRIPT_TTL = 30
+
     def __init__(self):
         self.commands_dir = Config.COMMANDS_DIR
         self.ddm_scripts_dir = Config.DDM_SCRIPTS_DIR
@@ -73,6 +106,14 @@ class CommandExecutor:
         self.default_timeout = Config.COMMAND_TIMEOUT
         self.bulk_timeout = Config.COMMAND_TIMEOUT_BULK
         self.bulk_delay = Config.BULK_COMMAND_DELAY
+        self._auth_creds = None
+        self._auth_header = None
+        self._script_cache: Dict[Tuple[str, Optional[str]], str] = {}
+        # (script_name, script_dir) -> time.monotonic() when the miss expires
+        self._missing_scripts: Dict[Tuple[str, Optional[str]], float] = {}
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+        self._env: Optional[Dict[str, str]] = None
 
     def sanitize(self, value: Any) -> str:
         """
@@ -87,24 +128,30 @@ class CommandExecutor:
         if value is None:
             return ''
 
-        value = str(value).strip()
-
-        for char in self.DANGEROUS_CHARS:
-            value = value.replace(char, '')
-
-        return value
+        return str(value).strip().translate(self._STRIP_TABLE)
 
     def sanitize_all(self, *values) -> Tuple[str, ...]:
         """Sanitize multiple values."""
         return tuple(self.sanitize(v) for v in values)
 
     def _get_env(self) -> Dict[str, str]:
-        """Get environment for subprocess execution."""
-        return Config.get_subprocess_env()
+        """Get environment for subprocess execution (built once, see reload_env)."""
+        if self._env is None:
+            self._env = Config.get_subprocess_env()
+        return self._env
+
+    def reload_env(self) -> None:
+        """Rebuild subprocess environment on next run (call after config change)."""
+        self._env = None
+
+    def clear_script_cache(self) -> None:
+        """Forget resolved and missing script lookups (call after deploying scripts)."""
+        self._script_cache.clear()
+        self._missing_scripts.clear()
 
     def _find_script(self, script_name: str, script_dir: str = None) -> Optional[str]:
         """
-        Find script path.
+        Find script path (cached per script/directory, misses for MISSING_SCRIPT_TTL).
 
         Args:
             script_name: Script name or path
@@ -113,6 +160,22 @@ class CommandExecutor:
         Returns:
             Full script path or None if not found
         """
+        key = (script_name, script_dir)
+        script_path = self._script_cache.get(key)
+        if script_path is None:
+            now = time.monotonic()
+            if self._missing_scripts.get(key, 0) > now:
+                return None
+            script_path = self._locate_script(script_name, script_dir)
+            if script_path:
+                self._script_cache[key] = script_path
+                self._missing_scripts.pop(key, None)
+            else:
+                self._missing_scripts[key] = now + self.MISSING_SCRIPT_TTL
+        return script_path
+
+    def _locate_script(self, script_name: str, script_dir: str = None) -> Optional[str]:
+        """Search script on disk (uncached part of _find_script)."""
         # If already absolute path
         if os.path.isabs(script_name):
             return script_name if os.path.exists(script_name) else None
@@ -157,8 +220,27 @@ class CommandExecutor:
                 error=f'Script not found: {script}'
             )
 
-        # Build command with sanitized arguments
-        cmd = [script_path] + [self.sanitize(arg) for arg in args if arg]
+        # Build command with sanitized arguments (only None is skipped; "", 0, False are kept)
+        cmd_args = [self.sanitize(arg) for arg in args if arg is not None]
+
+        return self._execute(script, script_path, cmd_args, timeout=timeout, cwd=cwd)
+
+    def _execute(self, script: str, script_path: str, cmd_args: List[str],
+                 timeout: int = None, cwd: str = None) -> CommandResult:
+        """
+        Execute resolved script with already sanitized arguments.
+
+        Args:
+            script: Script name as requested (for logging)
+            script_path: Full script path (from _find_script)
+            cmd_args: Sanitized arguments
+            timeout: Timeout in seconds (default from config)
+            cwd: Working directory for execution
+
+        Returns:
+            CommandResult with success, output, return_code
+        """
+        cmd = [script_path, *cmd_args]
 
         timeout = timeout or self.default_timeout
         working_dir = cwd or os.path.dirname(script_path)
@@ -166,17 +248,17 @@ class CommandExecutor:
         logger.info(f"Executing: {' '.join(cmd)}")
 
         try:
+            # stderr is merged into stdout by the OS; output is decoded once
             result = subprocess.run(
                 cmd,
                 stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
+                stderr=subprocess.STDOUT,
                 timeout=timeout,
                 cwd=working_dir,
                 env=self._get_env()
             )
 
-            output = result.stdout + result.stderr
+            output = result.stdout.decode('utf-8', 'replace')
             success = result.returncode == 0
 
             # Try to extract command_uuid from output
@@ -207,6 +289,17 @@ class CommandExecutor:
                 error=str(e)
             )
 
+    def _get_pool(self) -> ThreadPoolExecutor:
+        """Get shared worker pool for bulk execution (created on first use)."""
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(
+                        max_workers=Config.COMMAND_POOL_WORKERS,
+                        thread_name_prefix='cmdexec'
+                    )
+        return self._pool
+
     def run_bulk(self, script: str, devices: List[str], *args,
                  max_workers: int = 10, timeout: int = None,
                  progress_callback: Callable[[str, CommandResult], None] = None) -> List[CommandResult]:
@@ -217,7 +310,7 @@ class CommandExecutor:
             script: Script name or path
             devices: List of device UUIDs
             *args: Additional arguments (device UUID will be first arg)
-            max_workers: Maximum parallel workers
+            max_workers: Maximum parallel workers for this call (capped by shared pool size)
             timeout: Timeout per device
             progress_callback: Called with (device, result) after each completion
 
@@ -227,16 +320,43 @@ class CommandExecutor:
         results = []
         timeout = timeout or self.default_timeout
 
+        # Resolve script and sanitize shared arguments once for all devices
+        script_path = self._find_script(script)
+        shared_args = [self.sanitize(arg) for arg in args if arg is not None]
+
         def run_for_device(device: str) -> CommandResult:
-            result = self.run(script, device, *args, timeout=timeout)
+            if not script_path:
+                result = CommandResult(
+                    success=False,
+                    output='',
+                    return_code=-1,
+                    error=f'Script not found: {script}'
+                )
+            else:
+                device_args = [self.sanitize(device)] if device is not None else []
+                result = self._execute(script, script_path, device_args + shared_args, timeout=timeout)
             result.device = device
             return result
 
-        with ThreadPoolExecutor(max_workers=max_workers) as pool:
-            futures = {pool.submit(run_for_device, d): d for d in devices}
+        # Keep at most max_workers devices in flight on the shared pool
+        pool = self._get_pool()
+        pending_devices = iter(devices)
+        futures = {}
+
+        def submit_next() -> None:
+            for device in pending_devices:
+                futures[pool.submit(run_for_device, device)] = device
+                return
 
-            for future in as_completed(futures):
-                device = futures[future]
+        for _ in range(max(1, max_workers)):
+            submit_next()
+
+        while futures:
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                device = futures.pop(future)
+                submit_next()
                 try:
                     result = future.result()
                 except Exception as e:
@@ -257,38 +377,92 @@ class CommandExecutor:
 
     def _extract_command_uuid(self, output: str) -> Optional[str]:
         """Extract command_uuid from script output."""
-        # Try JSON format: "command_uuid": "xxx"
-        match = re.search(r'"command_uuid"\s*:\s*"([a-f0-9-]+)"', output, re.IGNORECASE)
-        if match:
-            return match.group(1)
-
-        # Try plain UUID pattern after command_uuid keyword
-        match = re.search(
-            r'command_uuid["\s:]+([a-f0-9]{8}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{12})',
-            output, re.IGNORECASE
-        )
-        if match:
-            return match.group(1)
-
-        # Try "Command UUID:" format from shell scripts
-        match = re.search(
-            r'Command\s+UUID:\s*([a-f0-9]{8}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{12})',
-            output, re.IGNORECASE
-        )
-        if match:
-            return match.group(1)
-
-        return None
+        # Single pass over output; JSON format wins, then keyword, then label
+        keyword = label = None
+        for match in _RE_COMMAND_UUID.finditer(output):
+            if match.group('json'):
+                return match.group('json')
+            if keyword is None and match.group('kw'):
+                keyword = match.group('kw')
+            elif label is None and match.group('label'):
+                label = match.group('label')
+
+        return keyword or label
 
     # ==========================================================================
     # MDM API METHODS
     # ==========================================================================
 
     def _get_auth_header(self) -> str:
-        """Get Basic auth header for MDM API."""
-        credentials = f"{Config.MDM_API_USER}:{Config.MDM_API_KEY}"
-        encoded = base64.b64encode(credentials.encode()).decode()
-        return f"Basic {encoded}"
+        """Get Basic auth header for MDM API (re-encoded only if credentials change)."""
+        creds = (Config.MDM_API_USER, Config.MDM_API_KEY)
+        if creds != self._auth_creds:
+            encoded = base64.b64encode(f"{creds[0]}:{creds[1]}".encode()).decode()
+            self._auth_header = f"Basic {encoded}"
+            self._auth_creds = creds
+        return self._auth_header
+
+    def _get_connection(self, url: str, timeout: int) -> Tuple[http.client.HTTPConnection, str]:
+        """
+        Get persistent (keep-alive) connection for URL, reused per thread.
+
+        Returns:
+            Tuple of (connection, request path)
+        """
+        parts = urlsplit(url)
+        key = (parts.scheme, parts.netloc)
+
+        pool = getattr(_http_local, 'connections', None)
+        if pool is None:
+            pool = _http_local.connections = {}
+
+        conn = pool.get(key)
+        if conn is None:
+            conn_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+            conn = pool[key] = conn_class(parts.netloc, timeout=timeout)
+        else:
+            conn.timeout = timeout
+            if conn.sock is not None:
+                if _is_stale(conn.sock):
+                    # Server closed the idle connection - reconnect before sending
+                    conn.close()
+                else:
+                    conn.sock.settimeout(timeout)
+
+        path = parts.path or '/'
+        if parts.query:
+            path += '?' + parts.query
+        return conn, path
+
+    def _api_request(self, method: str, url: str, body: bytes = None,
+                     headers: Dict[str, str] = None, timeout: int = 10) -> Tuple[int, bytes]:
+        """
+        Send request to MDM API over a pooled keep-alive connection.
+
+        Stale idle connections are replaced before sending. A connection lost
+        after sending is retried once only for idempotent methods - PUT/POST
+        (command enqueue, push) may already have been processed.
+
+        Returns:
+            Tuple of (HTTP status, response body)
+        """
+        headers = dict(headers or {})
+        headers['Authorization'] = self._get_auth_header()
+
+        for attempt in range(2):
+            conn, path = self._get_connection(url, timeout)
+            try:
+                conn.request(method, path, body=body, headers=headers)
+                resp = conn.getresponse()
+                # Body must be fully read before the connection can be reused
+                return resp.status, resp.read()
+            except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError):
+                conn.close()
+                if attempt or method not in _IDEMPOTENT_METHODS:
+                    raise
+            except Exception:
+                conn.close()
+                raise
 
     def send_push(self, udid: str) -> bool:
         """
@@ -303,71 +477,69 @@ class CommandExecutor:
         url = f"{Config.MDM_PUSH_URL}/{udid}"
 
         try:
-            req = urllib.request.Request(url, method='POST')
-            req.add_header('Authorization', self._get_auth_header())
+            status, _ = self._api_request('POST', url, timeout=5)
+
+            if status == 200:
+                logger.info(f"Push sent to {udid}")
+                return True
 
-            with urllib.request.urlopen(req, timeout=5) as resp:
-                if resp.status == 200:
-                    logger.info(f"Push sent to {udid}")
-                    return True
+            logger.warning(f"Push failed for {udid}: HTTP {status}")
 
-        except urllib.error.HTTPError as e:
-            logger.warning(f"Push failed for {udid}: HTTP {e.code}")
         except Exception as e:
             logger.warning(f"Push failed for {udid}: {e}")
 
         return False
 
-    def send_mdm_command(self, udid: str, plist_xml: str) -> CommandResult:
+    def send_mdm_command(self, udid: str, plist_xml: Union[str, bytes]) -> CommandResult:
         """
         Send MDM command via NanoMDM API.
 
         Args:
             udid: Device UUID
-            plist_xml: Command plist XML
+            plist_xml: Command plist XML (str or UTF-8 bytes from build_*_plist)
 
         Returns:
             CommandResult with success status and command_uuid
         """
         url = f"{Config.MDM_ENQUEUE_URL}/{udid}"
+        if isinstance(plist_xml, str):
+            plist_xml = plist_xml.encode('utf-8')
 
         try:
-            req = urllib.request.Request(
-                url,
-                data=plist_xml.encode('utf-8'),
-                method='PUT'
+            status, body = self._api_request(
+                'PUT', url,
+                body=plist_xml,
+                headers={'Content-Type': 'application/xml'},
+                timeout=10
             )
-            req.add_header('Content-Type', 'application/xml')
-            req.add_header('Authorization', self._get_auth_header())
-
-            with urllib.request.urlopen(req, timeout=10) as resp:
-                response_body = resp.read().decode('utf-8')
-
-                if resp.status == 200:
-                    # Extract command_uuid from response
-                    command_uuid = self._extract_command_uuid(response_body)
-                    return CommandResult(
-                        success=True,
-                        output=response_body,
-                        return_code=0,
-                        command_uuid=command_uuid
-                    )
-                else:
-                    return CommandResult(
-                        success=False,
-                        output=response_body,
-                        return_code=resp.status,
-                        error=f'MDM API error: HTTP {resp.status}'
-                    )
 
-        except urllib.error.HTTPError as e:
-            logger.error(f"MDM API error for {udid}: {e.code} {e.reason}")
-            return CommandResult(
-                success=False,
-                output='',
-                return_code=e.code,
-                error=f'MDM API error: HTTP {e.code} - Device may not be enrolled'
-            )
+            if status >= 300:
+                logger.error(f"MDM API error for {udid}: {status} {http.client.responses.get(status, '')}")
+                return CommandResult(
+                    success=False,
+                    output='',
+                    return_code=status,
+                    error=f'MDM API error: HTTP {status} - Device may not be enrolled'
+                )
+
+            response_body = body.decode('utf-8')
+
+            if status == 200:
+                # Extract command_uuid from response
+                command_uuid = self._extract_command_uuid(response_body)
+                return CommandResult(
+                    success=True,
+                    output=response_body,
+                    return_code=0,
+                    command_uuid=command_uuid
+                )
+            else:
+                return CommandResult(
+                    success=False,
+                    output=response_body,
+                    return_code=status,
+                    error=f'MDM API error: HTTP {status}'
+                )
 
         except Exception as e:
             logger.error(f"MDM command failed for {udid}: {e}")
@@ -383,75 +555,75 @@ class CommandExecutor:
     # ==========================================================================
 
     def build_device_information_plist(self, command_uuid: str,
-                                        queries: List[str] = None) -> str:
-        """Build DeviceInformation command plist."""
-        default_queries = [
-            'UDID', 'DeviceName', 'OSVersion', 'BuildVersion', 'ModelName',
-            'Model', 'ProductName', 'SerialNumber', 'DeviceCapacity',
-            'AvailableDeviceCapacity', 'BatteryLevel', 'CellularTechnology',
-            'IMEI', 'MEID', 'ModemFirmwareVersion', 'IsSupervised',
-            'IsDeviceLocatorServiceEnabled', 'IsActivationLockEnabled',
-            'IsDoNotDisturbInEffect', 'IsCloudBackupEnabled', 'OSUpdateSettings',
-            'LocalHostName', 'HostName', 'SystemIntegrityProtectionEnabled',
-            'IsMDMLostModeEnabled', 'WiFiMAC', 'BluetoothMAC', 'EthernetMAC'
-        ]
-
-        queries = queries or default_queries
-        queries_xml = '\n'.join(f'            <string>{q}</string>' for q in queries)
-
-        return f'''<?xml version="1.0" encoding="UTF-8"?>
-<!DOCTYPE plist PUBLIC "-//Apple//DTD PLIST 1.0//EN" "http://www.apple.com/DTDs/PropertyList-1.0.dtd">
-<plist version="1.0">
-<dict>
-    <key>Command</key>
-    <dict>
-        <key>RequestType</key>
-        <string>DeviceInformation</string>
-        <key>Queries</key>
-        <array>
-{queries_xml}
-        </array>
-    </dict>
-    <key>CommandUUID</key>
-    <string>{command_uuid}</string>
-</dict>
-</plist>'''
+                                        queries: List[str] = None) -> bytes:
+        """Build DeviceInformation command plist (UTF-8 bytes)."""
+        if queries:
+            queries_xml = _build_queries_xml(queries)
+        else:
+            queries_xml = _DEFAULT_QUERIES_XML
+
+        return _DEVICE_INFORMATION_PLIST % (queries_xml, command_uuid.encode('utf-8'))
+
+    def build_simple_command_plist(self, command_uuid: str, request_type: str) -> bytes:
+        """Build simple MDM command plist (no parameters, UTF-8 bytes)."""
+        return _SIMPLE_COMMAND_PLIST % (request_type.encode('utf-8'), command_uuid.encode('utf-8'))
+
+    def build_install_profile_plist(self, command_uuid: str, profile_data: bytes) -> bytes:
+        """Build InstallProfile command plist (UTF-8 bytes)."""
+        return _INSTALL_PROFILE_PLIST % (base64.b64encode(profile_data), command_uuid.encode('utf-8'))
+
 
-    def build_simple_command_plist(self, command_uuid: str, request_type: str) -> str:
-        """Build simple MDM command plist (no parameters)."""
-        return f'''<?xml version="1.0" encoding="UTF-8"?>
+# =============================================================================
+# PLIST TEMPLATES
+# =============================================================================
+
+_PLIST_HEADER = b'''<?xml version="1.0" encoding="UTF-8"?>
 <!DOCTYPE plist PUBLIC "-//Apple//DTD PLIST 1.0//EN" "http://www.apple.com/DTDs/PropertyList-1.0.dtd">
 <plist version="1.0">
 <dict>
     <key>Command</key>
     <dict>
         <key>RequestType</key>
-        <string>{request_type}</string>
+'''
+
+_PLIST_FOOTER = b'''
     </dict>
     <key>CommandUUID</key>
-    <string>{command_uuid}</string>
+    <string>%b</string>
 </dict>
 </plist>'''
 
-    def build_install_profile_plist(self, command_uuid: str, profile_data: bytes) -> str:
-        """Build InstallProfile command plist."""
-        encoded_profile = base64.b64encode(profile_data).decode('utf-8')
+_DEVICE_INFORMATION_PLIST = _PLIST_HEADER + b'''        <string>DeviceInformation</string>
+        <key>Queries</key>
+        <array>
+%b
+        </array>''' + _PLIST_FOOTER
 
-        return f'''<?xml version="1.0" encoding="UTF-8"?>
-<!DOCTYPE plist PUBLIC "-//Apple//DTD PLIST 1.0//EN" "http://www.apple.com/DTDs/PropertyList-1.0.dtd">
-<plist version="1.0">
-<dict>
-    <key>Command</key>
-    <dict>
-        <key>RequestType</key>
-        <string>InstallProfile</string>
+_SIMPLE_COMMAND_PLIST = _PLIST_HEADER + b'''        <string>%b</string>''' + _PLIST_FOOTER
+
+_INSTALL_PROFILE_PLIST = _PLIST_HEADER + b'''        <string>InstallProfile</string>
         <key>Payload</key>
-        <data>{encoded_profile}</data>
-    </dict>
-    <key>CommandUUID</key>
-    <string>{command_uuid}</string>
-</dict>
-</plist>'''
+        <data>%b</data>''' + _PLIST_FOOTER
+
+_DEFAULT_DEVICE_QUERIES = (
+    'UDID', 'DeviceName', 'OSVersion', 'BuildVersion', 'ModelName',
+    'Model', 'ProductName', 'SerialNumber', 'DeviceCapacity',
+    'AvailableDeviceCapacity', 'BatteryLevel', 'CellularTechnology',
+    'IMEI', 'MEID', 'ModemFirmwareVersion', 'IsSupervised',
+    'IsDeviceLocatorServiceEnabled', 'IsActivationLockEnabled',
+    'IsDoNotDisturbInEffect', 'IsCloudBackupEnabled', 'OSUpdateSettings',
+    'LocalHostName', 'HostName', 'SystemIntegrityProtectionEnabled',
+    'IsMDMLostModeEnabled', 'WiFiMAC', 'BluetoothMAC', 'EthernetMAC'
+)
+
+
+def _build_queries_xml(queries) -> bytes:
+    """Render DeviceInformation query list as <string> elements."""
+    return b'\n'.join(b'            <string>%b</string>' % q.encode('utf-8') for q in queries)
+
+
+# Default query list is rendered once - it is used by almost every call
+_DEFAULT_QUERIES_XML = _build_queries_xml(_DEFAULT_DEVICE_QUERIES)
 
 
 # =============================================================================
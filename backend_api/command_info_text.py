@@ -0,0 +1,21 @@
+"""
+NanoHUB Command Help Texts
+Help (info) texts for admin panel commands, served on demand by
+/api/commands/<cmd_id>/info instead of being embedded in the registry payload
+"""
+
+INFO_TEXT = {
+    'bulk_new_device_installation': 'Installs all required profiles and applications for new device based on selected manifest. Profiles and apps are loaded from database (required_profiles, required_applications tables). Optional: WiFi, FileVault, Directory Services, WireGuard.',
+    'manage_profiles': 'Manage profiles on selected devices. Select one or multiple devices. For Install: select a profile. For Remove: enter profile identifier.',
+    'ddm_status': 'View DDM configuration: declarations (policies), sets (device groups), or specific device enrollment.',
+    'manage_ddm_sets': 'Assign or remove DDM configuration sets. Select one or multiple devices. DDM sets are additive - to replace a set, remove the old one first.',
+    'ddm_force_sync': 'Send push notification to devices to force DDM declarations sync. Select one or more devices.',
+    'install_application': 'Install application via manifest URL. Pick from existing apps in required_applications table OR enter custom URL. If both filled, custom URL takes priority.',
+    'device_action': 'Perform device control actions. Erase requires admin role, typing "ERASE" to confirm, and will PERMANENTLY delete all data.',
+    'update_inventory': 'Query devices for inventory data and cache in database. Select specific devices OR use filters to update all matching devices.',
+    'schedule_os_update': 'Schedule OS update on selected devices. Select one or multiple devices.',
+    'manage_remote_desktop': 'Enable or disable Remote Desktop (ARD) on selected macOS devices. Select one or multiple devices.',
+    'manage_vpp_app': 'Install or remove VPP application. Select platform (iOS/macOS), action (Install/Remove), and one or multiple devices.',
+    'manage_applications': 'Manage applications in the required_applications table. LIST shows all apps grouped by manifest. ADD/EDIT/REMOVE modify the database.',
+    'manage_command_queue': 'View or clear pending MDM commands in the device queue.',
+}
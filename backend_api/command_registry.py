@@ -4,12 +4,123 @@ Metadata for all MDM commands available in admin panel
 Configuration loaded from /opt/nanohub/web_environment.sh
 """
 
-# Import configuration loader
-from web_config import (
-    get_branch_options, get_platform_options, get_manifest_options,
-    get_account_options, get_dep_options, get_os_update_action_options,
-    get_priority_options, get_yes_no_options, get_os_filter_options,
-    get_path
+import os
+import re
+import sys
+import json
+import mmap
+import hashlib
+import time
+from collections.abc import Mapping
+from functools import lru_cache
+from types import MappingProxyType
+
+# Import configuration loader (paths are needed at import, option getters are
+# looked up by name when the options are first resolved)
+import web_config
+from web_config import get_path, WEB_ENV_PATH
+
+
+class LazyOptions:
+    """Select options resolved on demand by calling an options getter.
+
+    fn is either a callable or the name of a web_config options getter.
+    """
+
+    __slots__ = ('fn', 'kwargs')
+
+    def __init__(self, fn, **kwargs):
+        self.fn = fn
+        self.kwargs = kwargs
+
+    def __call__(self):
+        fn = getattr(web_config, self.fn) if isinstance(self.fn, str) else self.fn
+        return fn(**self.kwargs)
+
+    def __repr__(self):
+        return f"LazyOptions({getattr(self.fn, '__name__', self.fn)}, {self.kwargs})"
+
+
+class _LazyCommands(Mapping):
+    """Read-only view of the resolved registry, built/refreshed on first access."""
+
+    __slots__ = ()
+
+    def __getitem__(self, cmd_id):
+        _refresh_commands()
+        return _COMMANDS[cmd_id]
+
+    def __iter__(self):
+        _refresh_commands()
+        return iter(_COMMANDS)
+
+    def __len__(self):
+        _refresh_commands()
+        return len(_COMMANDS)
+
+    # Whole-registry views refresh once and read one consistent dict
+    def __contains__(self, cmd_id):
+        _refresh_commands()
+        return cmd_id in _COMMANDS
+
+    def get(self, cmd_id, default=None):
+        _refresh_commands()
+        return _COMMANDS.get(cmd_id, default)
+
+    def keys(self):
+        _refresh_commands()
+        return _COMMANDS.keys()
+
+    def items(self):
+        _refresh_commands()
+        return _COMMANDS.items()
+
+    def values(self):
+        _refresh_commands()
+        return _COMMANDS.values()
+
+    def __repr__(self):
+        return f"<commands {list(self)}>"
+
+
+# Dynamic option lists (from web_environment.sh / database), resolved when the registry is built
+# Basic options without empty selection
+_DYNAMIC_BRANCHES = LazyOptions('get_branch_options', include_empty=False)
+_DYNAMIC_PLATFORMS = LazyOptions('get_platform_options', include_empty=False)
+_DYNAMIC_MANIFESTS = LazyOptions('get_manifest_options', include_empty=False)
+
+# Options with "All" selection for filters
+_DYNAMIC_MANIFESTS_ALL = LazyOptions('get_manifest_options', include_empty=True, empty_label='-- All Manifests --')
+_DYNAMIC_ACCOUNTS_ALL = LazyOptions('get_account_options', include_empty=True, empty_label='-- All Accounts --')
+
+# Options with "Select" selection
+_DYNAMIC_PLATFORMS_SELECT = LazyOptions('get_platform_options', include_empty=True, empty_label='-- Select --')
+
+# Options with "Default" selection
+_DYNAMIC_MANIFESTS_DEFAULT = LazyOptions('get_manifest_options', include_empty=True, empty_label='-- Default --')
+_DYNAMIC_ACCOUNTS_DEFAULT = LazyOptions('get_account_options', include_empty=True, empty_label='-- Default --')
+_DYNAMIC_DEP_DEFAULT = LazyOptions('get_dep_options', include_empty=True, empty_label='-- Default --')
+
+# OS filter with auto option
+_DYNAMIC_OS_FILTER = LazyOptions('get_os_filter_options')
+
+# Applications for New Device Installation (populated at render time)
+_DYNAMIC_APPLICATIONS = LazyOptions(list)
+
+# Applications list for Manage Applications (populated at render time)
+_DYNAMIC_APPLICATIONS_LIST = LazyOptions(list)
+
+# Shared static option lists (frozen, so every command referencing them shares one object)
+@lru_cache(maxsize=None)
+def _yes_no_options(no_label='No', yes_label='Yes'):
+    """Return frozen no/yes option pair with the given labels."""
+    return (MappingProxyType({'value': 'no', 'label': no_label}),
+            MappingProxyType({'value': 'yes', 'label': yes_label}))
+
+
+_INSTALL_REMOVE_OPTS = (
+    MappingProxyType({'value': 'install', 'label': 'Install'}),
+    MappingProxyType({'value': 'remove', 'label': 'Remove'}),
 )
 
 # Command categories
@@ -49,7 +160,7 @@ COMMANDS = {
         'script': '_internal_bulk_install',
         'parameters': [
             {'name': 'manifest', 'label': 'Manifest', 'type': 'select', 'required': True,
-             'options': '_DYNAMIC_MANIFESTS'},
+             'options': _DYNAMIC_MANIFESTS},
             {'name': 'udid', 'label': 'Device', 'type': 'device', 'required': True},
             # Wildcard profile options
             {'name': 'account_type', 'label': 'Account Profile', 'type': 'select', 'required': False,
@@ -67,36 +178,23 @@ COMMANDS = {
              ]},
             # Optional profiles
             {'name': 'applications', 'label': 'Applications to Install', 'type': 'select_multiple', 'required': False,
-             'options': '_DYNAMIC_APPLICATIONS'},
+             'options': _DYNAMIC_APPLICATIONS},
             {'name': 'install_wifi', 'label': 'Install WiFi Profile', 'type': 'select', 'required': False,
-             'options': [
-                 {'value': 'no', 'label': 'No - Skip WiFi'},
-                 {'value': 'yes', 'label': 'Yes - Install WiFi'},
-             ]},
+             'options': _yes_no_options('No - Skip WiFi', 'Yes - Install WiFi')},
             {'name': 'install_filevault', 'label': 'Install FileVault (macOS)', 'type': 'select', 'required': False,
-             'options': [
-                 {'value': 'no', 'label': 'No - Skip FileVault'},
-                 {'value': 'yes', 'label': 'Yes - Client must be logged in'},
-             ]},
+             'options': _yes_no_options('No - Skip FileVault', 'Yes - Client must be logged in')},
             {'name': 'install_directory_services', 'label': 'Join Active Directory (macOS)', 'type': 'select', 'required': False,
-             'options': [
-                 {'value': 'no', 'label': 'No - Skip AD join'},
-                 {'value': 'yes', 'label': 'Yes - Join AD (requires hostname)'},
-             ]},
+             'options': _yes_no_options('No - Skip AD join', 'Yes - Join AD (requires hostname)')},
             {'name': 'hostname', 'label': 'Hostname (for AD)', 'type': 'string', 'required': False,
              'placeholder': 'e.g. device08'},
             {'name': 'install_wireguard', 'label': 'Install WireGuard Profile', 'type': 'select', 'required': False,
-             'options': [
-                 {'value': 'no', 'label': 'No - Skip WireGuard'},
-                 {'value': 'yes', 'label': 'Yes - Search by username'},
-             ]},
+             'options': _yes_no_options('No - Skip WireGuard', 'Yes - Search by username')},
             {'name': 'wireguard_username', 'label': 'WireGuard Username', 'type': 'string', 'required': False,
              'placeholder': 'e.g. j.smith or smith'},
         ],
         'dangerous': False,
         'min_role': 'operator',
         'bulk_supported': False,
-        'info_text': 'Installs all required profiles and applications for new device based on selected manifest. Profiles and apps are loaded from database (required_profiles, required_applications tables). Optional: WiFi, FileVault, Directory Services, WireGuard.',
     },
 
     # =========================================================================
@@ -124,7 +222,6 @@ COMMANDS = {
         'dangerous': False,
         'min_role': 'operator',
         'bulk_supported': False,
-        'info_text': 'Manage profiles on selected devices. Select one or multiple devices. For Install: select a profile. For Remove: enter profile identifier.',
     },
 
     # =========================================================================
@@ -150,7 +247,6 @@ COMMANDS = {
         'dangerous': False,
         'min_role': 'report',
         'bulk_supported': False,
-        'info_text': 'View DDM configuration: declarations (policies), sets (device groups), or specific device enrollment.',
     },
     'manage_ddm_sets': {
         'name': 'Manage DDM Sets',
@@ -170,7 +266,6 @@ COMMANDS = {
         'dangerous': False,
         'min_role': 'operator',
         'bulk_supported': False,
-        'info_text': 'Assign or remove DDM configuration sets. Select one or multiple devices. DDM sets are additive - to replace a set, remove the old one first.',
     },
     'ddm_force_sync': {
         'name': 'DDM Force Sync',
@@ -183,7 +278,6 @@ COMMANDS = {
         'dangerous': False,
         'min_role': 'operator',
         'bulk_supported': True,
-        'info_text': 'Send push notification to devices to force DDM declarations sync. Select one or more devices.',
     },
 
     # =========================================================================
@@ -204,7 +298,6 @@ COMMANDS = {
         'dangerous': False,
         'min_role': 'operator',
         'bulk_supported': False,
-        'info_text': 'Install application via manifest URL. Pick from existing apps in required_applications table OR enter custom URL. If both filled, custom URL takes priority.',
     },
     'installed_application_list': {
         'name': 'List Installed Apps',
@@ -248,7 +341,6 @@ COMMANDS = {
         'danger_level': 'high',
         'min_role': 'operator',
         'bulk_supported': False,
-        'info_text': 'Perform device control actions. Erase requires admin role, typing "ERASE" to confirm, and will PERMANENTLY delete all data.',
     },
 
     'update_inventory': {
@@ -264,7 +356,7 @@ COMMANDS = {
                  {'value': 'iOS', 'label': 'iOS only'},
              ]},
             {'name': 'manifest', 'label': 'Manifest', 'type': 'select', 'required': False,
-             'options': '_DYNAMIC_MANIFESTS_ALL'},
+             'options': _DYNAMIC_MANIFESTS_ALL},
             {'name': 'last_updated', 'label': 'Last Updated', 'type': 'select', 'required': False,
              'options': [
                  {'value': '', 'label': '-- All --'},
@@ -277,7 +369,6 @@ COMMANDS = {
         'dangerous': False,
         'min_role': 'operator',
         'bulk_supported': True,
-        'info_text': 'Query devices for inventory data and cache in database. Select specific devices OR use filters to update all matching devices.',
     },
 
     # =========================================================================
@@ -316,7 +407,6 @@ COMMANDS = {
         'danger_level': 'medium',
         'min_role': 'operator',
         'bulk_supported': False,
-        'info_text': 'Schedule OS update on selected devices. Select one or multiple devices.',
     },
     'available_os_updates': {
         'name': 'Available OS Updates',
@@ -364,7 +454,6 @@ COMMANDS = {
         'danger_level': 'medium',
         'min_role': 'operator',
         'bulk_supported': False,
-        'info_text': 'Enable or disable Remote Desktop (ARD) on selected macOS devices. Select one or multiple devices.',
     },
 
     # =========================================================================
@@ -493,10 +582,7 @@ COMMANDS = {
                  {'value': 'macos', 'label': 'macOS'},
              ]},
             {'name': 'action', 'label': 'Action', 'type': 'select', 'required': True,
-             'options': [
-                 {'value': 'install', 'label': 'Install'},
-                 {'value': 'remove', 'label': 'Remove'},
-             ]},
+             'options': _INSTALL_REMOVE_OPTS},
             {'name': 'devices', 'label': 'Devices', 'type': 'devices', 'required': True},
             {'name': 'adam_id', 'label': 'Adam ID', 'type': 'string', 'required': True,
              'placeholder': 'App Store Adam ID'},
@@ -504,7 +590,6 @@ COMMANDS = {
         'dangerous': False,
         'min_role': 'operator',
         'bulk_supported': False,
-        'info_text': 'Install or remove VPP application. Select platform (iOS/macOS), action (Install/Remove), and one or multiple devices.',
     },
 
     # =========================================================================
@@ -531,11 +616,11 @@ COMMANDS = {
             {'name': 'hostname', 'label': 'Hostname', 'type': 'string', 'required': False,
              'placeholder': 'e.g. office-mac01'},
             {'name': 'os', 'label': 'OS', 'type': 'select', 'required': False,
-             'options': '_DYNAMIC_PLATFORMS_SELECT'},
+             'options': _DYNAMIC_PLATFORMS_SELECT},
             {'name': 'manifest', 'label': 'Manifest', 'type': 'select', 'required': False,
-             'options': '_DYNAMIC_MANIFESTS_DEFAULT'},
+             'options': _DYNAMIC_MANIFESTS_DEFAULT},
             {'name': 'account', 'label': 'Account', 'type': 'select', 'required': False,
-             'options': '_DYNAMIC_ACCOUNTS_DEFAULT'},
+             'options': _DYNAMIC_ACCOUNTS_DEFAULT},
         ],
         'dangerous': False,
         'min_role': 'operator',
@@ -555,9 +640,9 @@ COMMANDS = {
                  {'value': 'remove', 'label': 'REMOVE - Delete application'},
              ]},
             {'name': 'manifest', 'label': 'Manifest', 'type': 'select', 'required': False,
-             'options': '_DYNAMIC_MANIFESTS'},
+             'options': _DYNAMIC_MANIFESTS},
             {'name': 'app_id', 'label': 'Application (for edit/remove)', 'type': 'select', 'required': False,
-             'options': '_DYNAMIC_APPLICATIONS_LIST'},
+             'options': _DYNAMIC_APPLICATIONS_LIST},
             {'name': 'os', 'label': 'OS', 'type': 'select', 'required': False,
              'options': [
                  {'value': 'macos', 'label': 'macOS'},
@@ -573,7 +658,6 @@ COMMANDS = {
         'dangerous': False,
         'min_role': 'admin',
         'bulk_supported': False,
-        'info_text': 'Manage applications in the required_applications table. LIST shows all apps grouped by manifest. ADD/EDIT/REMOVE modify the database.',
     },
     'manage_command_queue': {
         'name': 'Command Queue',
@@ -592,7 +676,6 @@ COMMANDS = {
         'danger_level': 'low',
         'min_role': 'admin',
         'bulk_supported': False,
-        'info_text': 'View or clear pending MDM commands in the device queue.',
     },
     'send_command': {
         'name': 'Send Command',
@@ -626,159 +709,432 @@ COMMANDS = {
 }
 
 
+# =============================================================================
+# IMMUTABLE REGISTRY
+# =============================================================================
+
+# Strings up to this length (role names, types, option values...) are interned
+_INTERN_MAX_LEN = 32
+
+
+def _freeze(obj):
+    """Recursively convert dicts to read-only mappings and lists to tuples.
+
+    Keys and short string values are interned, so the many repeated literals
+    ('select', 'operator', 'devices'...) share one object.
+    """
+    if isinstance(obj, MappingProxyType):
+        return obj  # already frozen (shared option constants)
+    if isinstance(obj, dict):
+        return MappingProxyType({sys.intern(k): _freeze(v) for k, v in obj.items()})
+    if isinstance(obj, (list, tuple)):
+        return tuple(_freeze(v) for v in obj)
+    if isinstance(obj, str) and len(obj) <= _INTERN_MAX_LEN:
+        return sys.intern(obj)
+    return obj
+
+
+def thaw(obj):
+    """Return mutable deep copy (dicts/lists) of a frozen registry structure."""
+    if isinstance(obj, (dict, MappingProxyType)):
+        return {k: thaw(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [thaw(v) for v in obj]
+    return obj
+
+
+# Commands grouped by category (built on first use, reset when registry is rebuilt)
+_COMMANDS_BY_CATEGORY = None
+
+
 def get_commands_by_category():
-    """Return commands grouped by category"""
-    result = {}
-    for cat_id, cat_info in CATEGORIES.items():
-        result[cat_id] = {
+    """Return commands grouped by category (shared result - do not mutate)"""
+    global _COMMANDS_BY_CATEGORY
+    _refresh_commands()
+    if _COMMANDS_BY_CATEGORY is not None:
+        return _COMMANDS_BY_CATEGORY
+
+    # Categories are validated at import, so every command has its bucket
+    result = {
+        cat_id: {
             'info': cat_info,
-            'commands': {}
+            'commands': {cmd_id: _COMMANDS[cmd_id] for cmd_id in _BY_CATEGORY.get(cat_id, ())}
         }
+        for cat_id, cat_info in CATEGORIES_ORDERED
+    }
 
-    for cmd_id, cmd_info in COMMANDS.items():
-        cat = cmd_info.get('category', 'other')
-        if cat in result:
-            result[cat]['commands'][cmd_id] = cmd_info
-
+    _COMMANDS_BY_CATEGORY = result
     return result
 
 
 def get_command(cmd_id):
     """Get command by ID"""
-    return COMMANDS.get(cmd_id)
+    _refresh_commands()
+    return _COMMANDS.get(cmd_id)
+
+
+def get_command_by_script(script):
+    """Get command ID for script name (None if no command uses it)"""
+    return _BY_SCRIPT.get(script)
+
+
+def get_command_info(cmd_id):
+    """Get help text of command ('' if none) - texts live in command_info_text, loaded on first use"""
+    from command_info_text import INFO_TEXT
+    return INFO_TEXT.get(cmd_id, '')
+
+
+def get_required_params(cmd_id):
+    """Get names of required parameters without default value (empty frozenset if none)"""
+    return _REQUIRED_PARAMS.get(cmd_id, frozenset())
+
+
+# Command IDs accessible per user role (filled on first use)
+_ROLE_COMMANDS_CACHE = {}
+
 
+def commands_for_role(user_role):
+    """Return frozenset of command IDs the role is allowed to use"""
+    cmd_ids = _ROLE_COMMANDS_CACHE.get(user_role)
+    if cmd_ids is None:
+        cmd_ids = frozenset().union(*(
+            ids for min_role, ids in _BY_ROLE.items()
+            if check_role_permission(user_role, min_role)
+        ))
+        _ROLE_COMMANDS_CACHE[user_role] = cmd_ids
+    return cmd_ids
 
-def _extract_profile_identifier(filepath):
-    """Extract PayloadIdentifier from a mobileconfig file"""
-    import re
+
+# OS filters accepted by commands_for() (None = all platforms)
+OS_FILTERS = (None, 'macos', 'ios')
+
+
+def commands_for(user_role, os_filter=None):
+    """Return frozenset of command IDs the role may use on given OS ('macos', 'ios' or None for all)"""
+    cmd_ids = commands_for_role(user_role)
+    if os_filter:
+        cmd_ids = cmd_ids - _OS_EXCLUDED.get(os_filter, frozenset())
+    return cmd_ids
+
+
+# Serialized /api/commands payloads per (role, os_filter) (cleared by reload_commands)
+_COMMANDS_JSON_CACHE = {}
+
+
+def _get_commands_payload(user_role, os_filter=None):
+    """Return cached (payload, etag) of commands available to role and OS."""
+    _refresh_commands()
+    key = (user_role, os_filter)
+    cached = _COMMANDS_JSON_CACHE.get(key)
+    if cached is None:
+        available = {cmd_id: thaw(_COMMANDS[cmd_id]) for cmd_id in commands_for(user_role, os_filter)}
+        payload = json.dumps(available, sort_keys=True).encode('utf-8')
+        cached = (payload, hashlib.sha256(payload).hexdigest()[:16])
+        _COMMANDS_JSON_CACHE[key] = cached
+    return cached
+
+
+def get_commands_json(user_role, os_filter=None):
+    """Get JSON payload (bytes) of commands available to role/OS, serialized once per combination"""
+    return _get_commands_payload(user_role, os_filter)[0]
+
+
+def get_commands_etag(user_role, os_filter=None):
+    """Get ETag of the role/OS JSON payload (changes whenever the registry is rebuilt)"""
+    return _get_commands_payload(user_role, os_filter)[1]
+
+
+# PayloadIdentifier in raw mobileconfig bytes (signed profiles embed the plist as-is)
+_PAYLOAD_IDENTIFIER_KEY = b'<key>PayloadIdentifier</key>'
+_PAYLOAD_IDENTIFIER_RE = re.compile(rb'<key>PayloadIdentifier</key>\s*<string>([^<]+)</string>')
+
+
+def _extract_profile_identifier(filepath, stat=None):
+    """Extract PayloadIdentifier from a mobileconfig file (cached until file changes)"""
     try:
-        # Read file as binary and decode, ignoring errors (handles signed profiles)
-        with open(filepath, 'rb') as f:
-            content = f.read().decode('utf-8', errors='ignore')
-
-        # Find PayloadIdentifier using regex
-        match = re.search(r'<key>PayloadIdentifier</key>\s*<string>([^<]+)</string>', content)
-        if match:
-            return match.group(1).strip()
+        stat = stat or os.stat(filepath)
+    except OSError:
+        return ''
+    return _cached_profile_identifier(filepath, stat.st_mtime_ns, stat.st_size)
+
+
+@lru_cache(maxsize=2048)
+def _cached_profile_identifier(filepath, mtime_ns, size):
+    """Read PayloadIdentifier, memoized per (path, mtime, size)."""
+    return _read_profile_identifier(filepath)
+
+
+def _read_profile_identifier(filepath):
+    """Read PayloadIdentifier from mobileconfig file ('' if missing)"""
+    try:
+        # Search raw bytes (handles signed profiles) through a read-only mapping,
+        # locate the key with find() first and only run the regex from there
+        with open(filepath, 'rb') as f, \
+                mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as content:
+            pos = content.find(_PAYLOAD_IDENTIFIER_KEY)
+            while pos >= 0:
+                match = _PAYLOAD_IDENTIFIER_RE.match(content, pos)
+                if match:
+                    return match.group(1).decode('utf-8', errors='ignore').strip()
+                pos = content.find(_PAYLOAD_IDENTIFIER_KEY, pos + 1)
     except Exception:
         pass
     return ''
 
 
+def _iter_signed_profiles(root, recursive=False):
+    """Yield DirEntry of *.signed.mobileconfig files under root (hidden entries skipped like glob)."""
+    stack = [root]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as entries:
+                for entry in entries:
+                    if entry.name.startswith('.'):
+                        continue
+                    if entry.is_dir():
+                        if recursive:
+                            stack.append(entry.path)
+                    elif entry.name.endswith('.signed.mobileconfig') and entry.is_file():
+                        yield entry
+        except OSError:
+            continue
+
+
 def get_available_profiles():
     """Get list of available signed profiles only"""
-    import os
-    import glob
-
     profiles = []
 
     # Standard profiles - only signed ones (*.signed.mobileconfig)
-    if os.path.exists(PROFILE_DIRS['standard']):
-        for f in glob.glob(os.path.join(PROFILE_DIRS['standard'], '*.signed.mobileconfig')):
-            profiles.append({
-                'path': f,
-                'name': os.path.basename(f),
-                'identifier': _extract_profile_identifier(f),
-                'type': 'standard'
-            })
+    for entry in _iter_signed_profiles(PROFILE_DIRS['standard']):
+        profiles.append({
+            'path': entry.path,
+            'name': entry.name,
+            'identifier': _extract_profile_identifier(entry.path, entry.stat()),
+            'type': 'standard'
+        })
 
-    # WireGuard profiles - recursive search for signed profiles
-    if os.path.exists(PROFILE_DIRS['wireguard']):
-        for f in glob.glob(os.path.join(PROFILE_DIRS['wireguard'], '**/*.signed.mobileconfig'), recursive=True):
-            # Extract relative path for better identification
-            rel_path = os.path.relpath(f, PROFILE_DIRS['wireguard'])
+    # WireGuard and WiFi EAP-TLS profiles - recursive search for signed profiles
+    for profile_type in ('wireguard', 'wifi'):
+        root = PROFILE_DIRS[profile_type]
+        for entry in _iter_signed_profiles(root, recursive=True):
             profiles.append({
-                'path': f,
-                'name': os.path.basename(f),
-                'rel_path': rel_path,
-                'identifier': _extract_profile_identifier(f),
-                'type': 'wireguard'
+                'path': entry.path,
+                'name': entry.name,
+                # Relative path for better identification
+                'rel_path': os.path.relpath(entry.path, root),
+                'identifier': _extract_profile_identifier(entry.path, entry.stat()),
+                'type': profile_type
             })
 
+    return sorted(profiles, key=lambda x: x['name'])
 
-    # WiFi EAP-TLS profiles - recursive search for signed profiles
-    if os.path.exists(PROFILE_DIRS['wifi']):
-        for f in glob.glob(os.path.join(PROFILE_DIRS['wifi'], '**/*.signed.mobileconfig'), recursive=True):
-            rel_path = os.path.relpath(f, PROFILE_DIRS['wifi'])
-            profiles.append({
-                'path': f,
-                'name': os.path.basename(f),
-                'rel_path': rel_path,
-                'identifier': _extract_profile_identifier(f),
-                'type': 'wifi'
-            })
 
-    return sorted(profiles, key=lambda x: x['name'])
+# Role levels for command permissions
+# bel-admin has same permission level as admin, just filtered by manifest
+_ROLE_RANK = MappingProxyType({'admin': 3, 'bel-admin': 3, 'operator': 2, 'report': 1})
 
 
 def check_role_permission(user_role, required_role):
     """Check if user role meets minimum requirement"""
-    # bel-admin has same permission level as admin, just filtered by manifest
-    role_hierarchy = {'admin': 3, 'bel-admin': 3, 'operator': 2, 'report': 1}
-    return role_hierarchy.get(user_role, 0) >= role_hierarchy.get(required_role, 0)
+    return _ROLE_RANK.get(user_role, 0) >= _ROLE_RANK.get(required_role, 0)
 
 
 # =============================================================================
 # DYNAMIC OPTIONS RESOLUTION
 # =============================================================================
 
+# Resolved dynamic options are reused until TTL expires or web_environment.sh changes
+DYNAMIC_OPTIONS_TTL = 300  # seconds
+# web_environment.sh mtime is checked at most this often - lookups in between do no syscalls
+MTIME_CHECK_INTERVAL = 5  # seconds
+_dynamic_options_cache = None
+_dynamic_options_time = 0
+_dynamic_options_mtime = 0
+_dynamic_options_checked = 0
+
+
 def _get_dynamic_options():
-    """Build dynamic options mapping from web_environment.sh config."""
-    return {
-        # Basic options without empty selection
-        '_DYNAMIC_BRANCHES': get_branch_options(include_empty=False),
-        '_DYNAMIC_PLATFORMS': get_platform_options(include_empty=False),
-        '_DYNAMIC_MANIFESTS': get_manifest_options(include_empty=False),
+    """Get dynamic options mapping (memoized, see DYNAMIC_OPTIONS_TTL)."""
+    global _dynamic_options_cache, _dynamic_options_time, _dynamic_options_mtime, _dynamic_options_checked
 
-        # Options with "All" selection for filters
-        '_DYNAMIC_MANIFESTS_ALL': get_manifest_options(include_empty=True, empty_label='-- All Manifests --'),
-        '_DYNAMIC_ACCOUNTS_ALL': get_account_options(include_empty=True, empty_label='-- All Accounts --'),
+    now = time.monotonic()
+    if _dynamic_options_cache is not None and now - _dynamic_options_checked < MTIME_CHECK_INTERVAL:
+        return _dynamic_options_cache
+    _dynamic_options_checked = now
 
-        # Options with "Select" selection
-        '_DYNAMIC_PLATFORMS_SELECT': get_platform_options(include_empty=True, empty_label='-- Select --'),
+    try:
+        current_mtime = os.path.getmtime(WEB_ENV_PATH)
+    except OSError:
+        current_mtime = 0
 
-        # Options with "Default" selection
-        '_DYNAMIC_MANIFESTS_DEFAULT': get_manifest_options(include_empty=True, empty_label='-- Default --'),
-        '_DYNAMIC_ACCOUNTS_DEFAULT': get_account_options(include_empty=True, empty_label='-- Default --'),
-        '_DYNAMIC_DEP_DEFAULT': get_dep_options(include_empty=True, empty_label='-- Default --'),
+    if (_dynamic_options_cache is None or current_mtime != _dynamic_options_mtime
+            or now - _dynamic_options_time > DYNAMIC_OPTIONS_TTL):
+        _dynamic_options_cache = _build_dynamic_options()
+        _dynamic_options_time = now
+        _dynamic_options_mtime = current_mtime
 
-        # OS filter with auto option
-        '_DYNAMIC_OS_FILTER': get_os_filter_options(),
+    return _dynamic_options_cache
 
-        # Applications for New Device Installation (populated at render time)
-        '_DYNAMIC_APPLICATIONS': [],
 
-        # Applications list for Manage Applications (populated at render time)
-        '_DYNAMIC_APPLICATIONS_LIST': [],
-    }
+def _build_dynamic_options():
+    """Resolve every LazyOptions referenced by the command template."""
+    return {opts: opts() for opts in _TEMPLATE_LAZY_OPTIONS}
 
 
-def _resolve_dynamic_options(commands):
-    """Replace dynamic option placeholders with actual options."""
-    dynamic_opts = _get_dynamic_options()
+_MISSING = object()
+
+
+def _resolve_dynamic_options(commands, dynamic_opts):
+    """Replace LazyOptions placeholders with resolved option lists.
 
+    Only commands and parameters carrying a placeholder are copied, the rest
+    is shared with the frozen template.
+    """
+    resolved = {}
     for cmd_id, cmd in commands.items():
-        if 'parameters' not in cmd:
-            continue
+        params = None
+        for i, param in enumerate(cmd.get('parameters', ())):
+            options = param.get('options')
+            if not isinstance(options, LazyOptions):
+                continue
+            if params is None:
+                params = list(cmd['parameters'])
+            options = dynamic_opts.get(options, _MISSING)
+            if options is _MISSING:
+                print(f"[WARNING] Unresolved dynamic options: {cmd_id}.{param['name']}")
+                options = []
+            params[i] = dict(param, options=options)
+        if params is not None:
+            cmd = dict(cmd, parameters=params)
+        resolved[cmd_id] = cmd
 
-        for param in cmd['parameters']:
-            if 'options' in param and isinstance(param['options'], str):
-                placeholder = param['options']
-                if placeholder in dynamic_opts:
-                    param['options'] = dynamic_opts[placeholder]
-                else:
-                    print(f"[WARNING] Unknown dynamic option placeholder: {placeholder}")
+    return resolved
+
+
+def _build_commands(dynamic_opts):
+    """Resolve dynamic options against the template and freeze the result."""
+    resolved = _resolve_dynamic_options(_COMMANDS_TEMPLATE, dynamic_opts)
+    return {cmd_id: _freeze(cmd) for cmd_id, cmd in resolved.items()}
 
-    return commands
+
+def _refresh_commands():
+    """Build registry on first use, rebuild if dynamic options were refreshed since."""
+    global _COMMANDS, _commands_options, _COMMANDS_BY_CATEGORY
+    dynamic_opts = _get_dynamic_options()
+    if dynamic_opts is not _commands_options:
+        # Swap in a complete dict - threads iterating the old one are unaffected
+        _COMMANDS = _build_commands(dynamic_opts)
+        _commands_options = dynamic_opts
+        _COMMANDS_JSON_CACHE.clear()
+        _COMMANDS_BY_CATEGORY = None
 
 
 def reload_commands():
     """Reload commands with fresh configuration (call after config change)."""
-    global COMMANDS
-    from web_config import load_config
-    load_config(force_reload=True)
-    _resolve_dynamic_options(COMMANDS)
+    global _dynamic_options_cache, _commands_options
+    web_config.load_config(force_reload=True)
+    _dynamic_options_cache = None
+    # Re-resolved on next lookup
+    _commands_options = None
+
+
+# =============================================================================
+# SCHEMA VALIDATION (runs once at import - misconfigured commands fail fast)
+# =============================================================================
+
+_REQUIRED_COMMAND_KEYS = ('name', 'category', 'description', 'script', 'parameters', 'min_role')
+_OPTIONAL_COMMAND_KEYS = ('script_dir', 'dangerous', 'danger_level', 'bulk_supported',
+                          'has_device_autofill')
+_REQUIRED_PARAM_KEYS = ('name', 'label', 'type')
+_OPTIONAL_PARAM_KEYS = ('required', 'options', 'default', 'placeholder', 'help', 'filter_os')
+_PARAM_TYPES = ('select', 'select_multiple', 'string', 'device', 'devices', 'device_autofill', 'profile')
+_VALID_MIN_ROLES = ('report', 'operator', 'admin')
+
+
+def _validate_commands(commands):
+    """Check command definitions against the registry schema, raise ValueError on first error."""
+    for cmd_id, cmd in commands.items():
+        missing = [k for k in _REQUIRED_COMMAND_KEYS if k not in cmd]
+        if missing:
+            raise ValueError(f"Command '{cmd_id}': missing keys {missing}")
+        unknown = set(cmd) - set(_REQUIRED_COMMAND_KEYS) - set(_OPTIONAL_COMMAND_KEYS)
+        if unknown:
+            raise ValueError(f"Command '{cmd_id}': unknown keys {sorted(unknown)}")
+        if cmd['category'] not in CATEGORIES:
+            raise ValueError(f"Command '{cmd_id}': unknown category '{cmd['category']}'")
+        if cmd['min_role'] not in _VALID_MIN_ROLES:
+            raise ValueError(f"Command '{cmd_id}': invalid min_role '{cmd['min_role']}'")
+
+        for param in cmd['parameters']:
+            missing = [k for k in _REQUIRED_PARAM_KEYS if k not in param]
+            if missing:
+                raise ValueError(f"Command '{cmd_id}': parameter missing keys {missing}")
+            unknown = set(param) - set(_REQUIRED_PARAM_KEYS) - set(_OPTIONAL_PARAM_KEYS)
+            if unknown:
+                raise ValueError(f"Command '{cmd_id}': parameter '{param['name']}' has unknown keys {sorted(unknown)}")
+            if param['type'] not in _PARAM_TYPES:
+                raise ValueError(f"Command '{cmd_id}': parameter '{param['name']}' has invalid type '{param['type']}'")
+            options = param.get('options')
+            if param['type'] in ('select', 'select_multiple') and \
+                    not isinstance(options, (list, tuple, LazyOptions)):
+                raise ValueError(f"Command '{cmd_id}': parameter '{param['name']}' needs options list")
+
+
+_validate_commands(COMMANDS)
+
+
+# Keep the unresolved literal (with LazyOptions placeholders) so reloads can re-resolve,
+# then expose read-only registry: COMMANDS/CATEGORIES/PROFILE_DIRS must not be mutated,
+# use thaw() to get a modifiable copy
+_COMMANDS_TEMPLATE = _freeze(COMMANDS)
+_TEMPLATE_LAZY_OPTIONS = frozenset(
+    param['options'] for cmd in _COMMANDS_TEMPLATE.values() for param in cmd.get('parameters', ())
+    if isinstance(param.get('options'), LazyOptions)
+)
+# Dynamic options are resolved on first lookup (_refresh_commands), not at import -
+# workers that never list or run commands skip the config parsing entirely
+_commands_options = None
+_COMMANDS = {}
+# Any access through COMMANDS resolves first, it is never seen empty
+COMMANDS = _LazyCommands()
+CATEGORIES = _freeze(CATEGORIES)
+# Categories in display order ('order' is static, sorted once)
+CATEGORIES_ORDERED = tuple(sorted(CATEGORIES.items(), key=lambda item: item[1]['order']))
+PROFILE_DIRS = _freeze(PROFILE_DIRS)
+
+
+# =============================================================================
+# LOOKUP INDICES (command set is static, built once at import)
+# =============================================================================
+
+def _build_indices(commands):
+    """Build category, script, min_role, required params and OS exclusion lookups."""
+    by_category = {}
+    by_script = {}
+    by_role = {}
+    required = {}
+    os_excluded = {}
+    for cmd_id, cmd in commands.items():
+        by_category.setdefault(cmd.get('category', 'other'), []).append(cmd_id)
+        by_script.setdefault(cmd['script'], cmd_id)
+        by_role.setdefault(cmd.get('min_role', 'admin'), set()).add(cmd_id)
+        # Parameters with a default are always satisfied
+        required[cmd_id] = frozenset(
+            param['name'] for param in cmd.get('parameters', ())
+            if param.get('required') and not param.get('default')
+        )
+        # Commands with OS-restricted device parameters are hidden for other platforms
+        for os_name in OS_FILTERS[1:]:
+            if any(param.get('filter_os', os_name) != os_name for param in cmd.get('parameters', ())):
+                os_excluded.setdefault(os_name, set()).add(cmd_id)
+
+    return (
+        {cat_id: tuple(ids) for cat_id, ids in by_category.items()},
+        by_script,
+        {role: frozenset(ids) for role, ids in by_role.items()},
+        required,
+        {os_name: frozenset(ids) for os_name, ids in os_excluded.items()},
+    )
 
 
-# Initialize dynamic options on module load
-_resolve_dynamic_options(COMMANDS)
+_BY_CATEGORY, _BY_SCRIPT, _BY_ROLE, _REQUIRED_PARAMS, _OS_EXCLUDED = _build_indices(_COMMANDS_TEMPLATE)
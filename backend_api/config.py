@@ -33,7 +33,8 @@ class Config:
     DB_PASSWORD = os.environ.get('NANOHUB_DB_PASSWORD', '')
     DB_NAME = os.environ.get('NANOHUB_DB_NAME', 'nanohub')
 
-    # Connection dict for mysql.connector
+    # Connection dict for mysql.connector (snapshot at import - use get_db_config()
+    # to pick up rotated credentials)
     DB = {
         'host': DB_HOST,
         'port': DB_PORT,
@@ -74,6 +75,7 @@ class Config:
     WEBHOOK_POLL_MAX_ATTEMPTS = 20  # maximum poll attempts
     WEBHOOK_POLL_INTERVAL = 1  # seconds between polls
     WEBHOOK_POLL_WINDOW = 1000  # lines to read from end of log
+    WEBHOOK_POLL_LINE_BYTES = 512  # estimated log line length for tail reads (grown if short)
 
     # ==========================================================================
     # PATHS
@@ -136,6 +138,7 @@ class Config:
     # ==========================================================================
 
     VPP_TOKEN = os.environ.get('VPP_TOKEN', '')
+    _vpp_token_loaded = False  # environment.sh already searched for VPP_TOKEN
     VPP_API_URL = 'https://vpp.itunes.apple.com/mdm/v2'
 
     # Local app definition files
@@ -153,6 +156,9 @@ class Config:
     # Delay between bulk operations (seconds)
     BULK_COMMAND_DELAY = 2
 
+    # Shared worker pool for CommandExecutor.run_bulk (per-call limit via max_workers)
+    COMMAND_POOL_WORKERS = 32
+
     # PATH for subprocess execution
     SUBPROCESS_PATH = '/usr/local/bin:/usr/bin:/bin:/usr/local/sbin:/usr/sbin:/sbin'
 
@@ -203,8 +209,17 @@ class Config:
 
     @classmethod
     def get_db_config(cls):
-        """Return database configuration dict."""
-        return cls.DB.copy()
+        """Return database configuration dict, re-reading NANOHUB_DB_* from environment."""
+        env = os.environ
+        config = cls.DB.copy()
+        config.update({
+            'host': env.get('NANOHUB_DB_HOST', cls.DB_HOST),
+            'port': int(env.get('NANOHUB_DB_PORT', cls.DB_PORT)),
+            'user': env.get('NANOHUB_DB_USER', cls.DB_USER),
+            'password': env.get('NANOHUB_DB_PASSWORD', cls.DB_PASSWORD),
+            'database': env.get('NANOHUB_DB_NAME', cls.DB_NAME),
+        })
+        return config
 
     @classmethod
     def get_subprocess_env(cls):
@@ -215,21 +230,21 @@ class Config:
 
     @classmethod
     def load_vpp_token(cls):
-        """Load VPP token from environment.sh if not set."""
-        if cls.VPP_TOKEN:
-            return cls.VPP_TOKEN
+        """Load VPP token from environment.sh if not set (file is read at most once)."""
+        if cls.VPP_TOKEN or cls._vpp_token_loaded:
+            return cls.VPP_TOKEN or None
 
+        cls._vpp_token_loaded = True
         try:
-            with open(cls.ENVIRONMENT_FILE, 'r') as f:
+            with open(cls.ENVIRONMENT_FILE, 'r', encoding='utf-8', errors='replace') as f:
                 for line in f:
                     if line.startswith('export VPP_TOKEN='):
-                        token = line.split('=', 1)[1].strip().strip('"\'')
-                        cls.VPP_TOKEN = token
-                        return token
+                        cls.VPP_TOKEN = line.split('=', 1)[1].strip().strip('"\'')
+                        break
         except Exception:
             pass
-        return None
+        return cls.VPP_TOKEN or None
 
 
-# Backward compatibility - expose DB_CONFIG dict
+# Backward compatibility - expose DB_CONFIG dict (snapshot at import)
 DB_CONFIG = Config.DB
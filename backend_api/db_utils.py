@@ -22,48 +22,89 @@ Usage:
         cursor.execute("UPDATE ...", (...))
 """
 
+import base64
+import fnmatch
+import hashlib
+import hmac
 import logging
+import os
+import re
+import sys
+import threading
+import time
 import mysql.connector
-from mysql.connector import pooling, Error as MySQLError
+from mysql.connector import pooling, errorcode, Error as MySQLError
 from contextlib import contextmanager
-from typing import Optional, List, Dict, Any, Tuple, Union
+from functools import lru_cache
+from datetime import datetime
+from typing import Optional, List, Dict, Any, Tuple, Union, Iterator
 
 from config import Config
+from cache_utils import json_loads, device_cache, DeviceCache
+
+# argon2id for local user passwords (optional - scrypt from hashlib otherwise)
+try:
+    from argon2 import PasswordHasher
+    from argon2.exceptions import VerificationError, InvalidHashError
+    ARGON2_AVAILABLE = True
+except ImportError:
+    ARGON2_AVAILABLE = False
 
 logger = logging.getLogger('nanohub_db')
 
+# C extension (_mysql_connector) available - used instead of the pure Python protocol
+_HAVE_CEXT = getattr(mysql.connector, 'HAVE_CEXT', False)
+
 
 class DatabaseManager:
     """Database manager with connection pooling and helper methods."""
 
     def __init__(self):
         self._pool: Optional[pooling.MySQLConnectionPool] = None
+        self._pool_lock = threading.Lock()
+        self._tables: Optional[frozenset] = None
         self._init_pool()
 
     def _init_pool(self):
         """Initialize connection pool."""
         try:
             pool_config = Config.get_db_config()
+            # Row parsing in C when the extension is installed (mysql-connector-python[cext])
+            pool_config['use_pure'] = not _HAVE_CEXT
             pool_config['pool_name'] = Config.DB_POOL_NAME
             pool_config['pool_size'] = Config.DB_POOL_SIZE
             pool_config['pool_reset_session'] = Config.DB_POOL_RESET_SESSION
 
             self._pool = pooling.MySQLConnectionPool(**pool_config)
-            logger.info(f"Database pool '{Config.DB_POOL_NAME}' initialized with {Config.DB_POOL_SIZE} connections")
+            logger.info(f"Database pool '{Config.DB_POOL_NAME}' initialized with {Config.DB_POOL_SIZE} connections"
+                        f" ({'C extension' if _HAVE_CEXT else 'pure Python'} protocol)")
         except MySQLError as e:
             logger.error(f"Failed to initialize database pool: {e}")
             self._pool = None
 
+    def reload_pool(self, failed_pool: Optional[pooling.MySQLConnectionPool] = None):
+        """Re-create connection pool with current DB settings (e.g. after credential rotation).
+
+        With failed_pool, only rebuild if no other thread replaced that pool already.
+        """
+        with self._pool_lock:
+            if failed_pool is None or self._pool is failed_pool:
+                self._init_pool()
+
     def _get_connection(self) -> mysql.connector.MySQLConnection:
         """Get connection from pool or create new one."""
-        if self._pool:
+        pool = self._pool
+        if pool:
             try:
-                return self._pool.get_connection()
+                return pool.get_connection()
             except MySQLError as e:
                 logger.warning(f"Pool connection failed, creating direct connection: {e}")
+                if e.errno == errorcode.ER_ACCESS_DENIED_ERROR:
+                    # Credentials rotated since the pool was created - rebuild it from current settings
+                    self.reload_pool(pool)
 
         # Fallback to direct connection
-        return mysql.connector.connect(**Config.get_db_config())
+        return mysql.connector.connect(**Config.get_db_config(), use_pure=not _HAVE_CEXT)
 
     @contextmanager
     def connection(self):
@@ -90,6 +131,20 @@ class DatabaseManager:
             finally:
                 cursor.close()
 
+    @contextmanager
+    def read_cursor(self, dictionary: bool = True):
+        """Context manager for SELECT-only cursor - no COMMIT/ROLLBACK round trip.
+
+        The implicit read transaction ends when the connection is returned to
+        the pool (session reset) or closed.
+        """
+        with self.connection() as conn:
+            cursor = conn.cursor(dictionary=dictionary)
+            try:
+                yield cursor
+            finally:
+                cursor.close()
+
     @contextmanager
     def transaction(self):
         """Context manager for transaction with commit/rollback."""
@@ -115,7 +170,7 @@ class DatabaseManager:
         Returns:
             Dict with column names as keys, or None if no result
         """
-        with self.cursor() as cursor:
+        with self.read_cursor() as cursor:
             cursor.execute(sql, params or ())
             return cursor.fetchone()
 
@@ -130,10 +185,57 @@ class DatabaseManager:
         Returns:
             List of dicts, empty list if no results
         """
-        with self.cursor() as cursor:
+        with self.read_cursor() as cursor:
             cursor.execute(sql, params or ())
             return cursor.fetchall() or []
 
+    def query_all_tuple(self, sql: str, params: Tuple = None) -> Tuple[Tuple[str, ...], List[Tuple]]:
+        """
+        Execute query and return column names and rows as plain tuples (no per-row dict).
+
+        Args:
+            sql: SQL query with %s placeholders
+            params: Tuple of parameters
+
+        Returns:
+            (column names, list of row tuples)
+        """
+        with self.read_cursor(dictionary=False) as cursor:
+            cursor.execute(sql, params or ())
+            rows = cursor.fetchall() or []
+            return tuple(col[0] for col in cursor.description or ()), rows
+
+    def query_iter(self, sql: str, params: Tuple = None, chunk: int = 1000) -> Iterator[Dict[str, Any]]:
+        """
+        Execute query and yield rows as dicts, fetched in chunks from an unbuffered cursor.
+
+        The connection is held until the generator is exhausted or closed.
+
+        Args:
+            sql: SQL query with %s placeholders
+            params: Tuple of parameters
+            chunk: Rows fetched per round
+
+        Yields:
+            Dict with column names as keys
+        """
+        with self.connection() as conn:
+            cursor = conn.cursor(dictionary=True, buffered=False)
+            try:
+                cursor.execute(sql, params or ())
+                while True:
+                    rows = cursor.fetchmany(chunk)
+                    if not rows:
+                        break
+                    yield from rows
+            finally:
+                # Drain rows left by an abandoned iteration before releasing the connection
+                try:
+                    conn.consume_results()
+                except MySQLError:
+                    pass
+                cursor.close()
+
     def query_value(self, sql: str, params: Tuple = None) -> Any:
         """
         Execute query and return single value.
@@ -145,7 +247,7 @@ class DatabaseManager:
         Returns:
             Single value or None
         """
-        with self.cursor(dictionary=False) as cursor:
+        with self.read_cursor(dictionary=False) as cursor:
             cursor.execute(sql, params or ())
             row = cursor.fetchone()
             return row[0] if row else None
@@ -243,105 +345,180 @@ class DatabaseManager:
         sql = "SHOW TABLES LIKE %s"
         return self.query_value(sql, (table,)) is not None
 
+    def existing_tables(self) -> frozenset:
+        """Names of tables present at first call (one SHOW TABLES for all startup schema checks)."""
+        if self._tables is None:
+            _, rows = self.query_all_tuple("SHOW TABLES")
+            self._tables = frozenset(row[0] for row in rows)
+        return self._tables
+
 
 # =============================================================================
 # DEVICE-SPECIFIC HELPERS
 # =============================================================================
 
-class DeviceDB:
-    """Device-specific database operations."""
+def _device_status(last_seen: Optional[datetime], now: datetime) -> str:
+    """Derive online/active/offline status from last check-in (whole minutes, like TIMESTAMPDIFF).
 
-    def __init__(self, db_manager: DatabaseManager):
-        self.db = db_manager
-
-    def get_all(self, manifest_filter: str = None) -> List[Dict]:
-        """Get all devices with status from enrollments."""
-        sql = """
-            SELECT
-                di.uuid, di.serial, di.os, di.hostname, di.manifest,
-                di.account, di.dep,
-                e.max_last_seen as last_seen,
-                CASE
-                    WHEN e.max_last_seen IS NULL THEN 'offline'
-                    WHEN TIMESTAMPDIFF(MINUTE, e.max_last_seen, NOW()) <= 15 THEN 'online'
-                    WHEN TIMESTAMPDIFF(MINUTE, e.max_last_seen, NOW()) <= 60 THEN 'active'
-                    ELSE 'offline'
-                END as status
-            FROM device_inventory di
+    now must come from the DB server (db_now column) - last_seen_at is written
+    with its clock and session time zone.
+    """
+    if last_seen is None:
+        return 'offline'
+    minutes = (now - last_seen).total_seconds() // 60
+    if minutes <= Config.DEVICE_STATUS_ONLINE_MINUTES:
+        return 'online'
+    if minutes <= Config.DEVICE_STATUS_ACTIVE_MINUTES:
+        return 'active'
+    return 'offline'
+
+
+def _with_status(rows: List[Dict], last_seen_key: str) -> List[Dict]:
+    """Set 'status' on device rows in place from their last_seen and db_now columns."""
+    for row in rows:
+        row['status'] = _device_status(row[last_seen_key], row.pop('db_now'))
+    return rows
+
+
+# Per-device MAX(last_seen_at) aggregated over enrollments (reads
+# idx_device_last_seen, see scripts/migrations/001_enrollments_last_seen_index.sql)
+_LAST_SEEN_JOIN_SQL = """
             LEFT JOIN (
                 SELECT device_id, MAX(last_seen_at) as max_last_seen
                 FROM enrollments
                 GROUP BY device_id
-            ) e ON di.uuid = e.device_id
-        """
-        params = ()
+            ) e ON di.uuid = e.device_id"""
 
-        if manifest_filter:
-            sql += " WHERE di.manifest LIKE %s"
-            params = (manifest_filter,)
+# Whitelist of searchable columns (interpolated into SQL - never extend from input)
+_ALLOWED_SEARCH_FIELDS = frozenset(('uuid', 'serial', 'hostname', 'os', 'manifest', 'account'))
 
-        sql += " ORDER BY di.hostname"
+# Fields with an ngram FULLTEXT index (ft_search_<field>) - substring search
+# narrows via the index, LIKE keeps exact '%value%' semantics on the hits
+_FULLTEXT_SEARCH_FIELDS = ('uuid', 'serial', 'hostname')
+_FULLTEXT_MIN_LEN = 3
 
-        return self.db.query_all(sql, params)
 
-    def search(self, field: str, value: str, manifest_filter: str = None) -> List[Dict]:
-        """Search devices by field with optional manifest filter."""
-        # Whitelist allowed fields to prevent SQL injection
-        allowed_fields = ['uuid', 'serial', 'hostname', 'os', 'manifest', 'account']
-        if field not in allowed_fields:
-            field = 'hostname'
+def _build_device_sql(fulltext_fields: Tuple[str, ...] = ()) -> Dict[str, Any]:
+    """Build DeviceDB statements with last_seen_at aggregated from enrollments."""
+    ts, source = 'e.max_last_seen', 'FROM device_inventory di' + _LAST_SEEN_JOIN_SQL
 
-        sql = f"""
+    # status is derived in Python from last_seen and the DB clock (see _with_status),
+    # NOW() is constant within a statement
+    listing = f"""
             SELECT
                 di.uuid, di.serial, di.os, di.hostname, di.manifest,
                 di.account, di.dep,
-                e.max_last_seen as last_seen,
-                CASE
-                    WHEN e.max_last_seen IS NULL THEN 'offline'
-                    WHEN TIMESTAMPDIFF(MINUTE, e.max_last_seen, NOW()) <= 15 THEN 'online'
-                    WHEN TIMESTAMPDIFF(MINUTE, e.max_last_seen, NOW()) <= 60 THEN 'active'
-                    ELSE 'offline'
-                END as status
-            FROM device_inventory di
-            LEFT JOIN (
-                SELECT device_id, MAX(last_seen_at) as max_last_seen
-                FROM enrollments
-                GROUP BY device_id
-            ) e ON di.uuid = e.device_id
-            WHERE di.{field} LIKE %s
+                {ts} as last_seen, NOW() as db_now
+            {source}"""
+
+    return {
+        'get_all': listing + " ORDER BY di.hostname",
+        'get_all_manifest': listing + " WHERE di.manifest LIKE %s ORDER BY di.hostname",
+        # Searchable field -> (SQL, SQL with manifest filter)
+        'search': {
+            field: (
+                listing + f" WHERE di.{field} LIKE %s ORDER BY di.hostname",
+                listing + f" WHERE di.{field} LIKE %s AND di.manifest LIKE %s ORDER BY di.hostname",
+            )
+            for field in _ALLOWED_SEARCH_FIELDS
+        },
+        # Indexed field -> (SQL, SQL with manifest filter), params: phrase, LIKE pattern[, manifest]
+        'search_fulltext': {
+            field: (
+                listing + f" WHERE MATCH(di.{field}) AGAINST (%s IN BOOLEAN MODE)"
+                          f" AND di.{field} LIKE %s ORDER BY di.hostname",
+                listing + f" WHERE MATCH(di.{field}) AGAINST (%s IN BOOLEAN MODE)"
+                          f" AND di.{field} LIKE %s AND di.manifest LIKE %s ORDER BY di.hostname",
+            )
+            for field in fulltext_fields
+        },
+        'get_by_uuid': f"""
+            SELECT
+                di.uuid, di.serial, di.os, di.hostname, di.manifest,
+                di.account, di.dep, di.created_at, di.updated_at,
+                {ts} as last_seen_at, NOW() as db_now
+            {source}
+            WHERE di.uuid = %s""",
+    }
+
+
+class DeviceDB:
+    """Device-specific database operations."""
+
+    def __init__(self, db_manager: DatabaseManager):
+        self.db = db_manager
+        # Statements are built once, using FULLTEXT search indexes when available
+        self._sql = _build_device_sql(self._ensure_search_indexes())
+
+    def _ensure_search_indexes(self) -> Tuple[str, ...]:
+        """Return fields with ngram FULLTEXT search indexes.
+
+        Indexes are created by scripts/migrations/002_device_search_fulltext.sql
+        (a table rebuild, never run at startup); fields without one use LIKE scans.
         """
-        params = [f'%{value}%']
+        try:
+            rows = self.db.query_all("""
+                SELECT DISTINCT INDEX_NAME FROM information_schema.STATISTICS
+                WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'device_inventory'
+                  AND INDEX_TYPE = 'FULLTEXT'
+            """)
+        except Exception as e:
+            logger.warning(f"Device search uses LIKE scans (FULLTEXT index check failed): {e}")
+            return ()
+        existing = {row['INDEX_NAME'] for row in rows}
+        fields = tuple(f for f in _FULLTEXT_SEARCH_FIELDS if f'ft_search_{f}' in existing)
+        if len(fields) < len(_FULLTEXT_SEARCH_FIELDS):
+            logger.info("Device search FULLTEXT indexes missing for some fields, "
+                        "run scripts/migrations/002_device_search_fulltext.sql")
+        return fields
+
+    def get_all(self, manifest_filter: str = None, stream: bool = False) -> Union[List[Dict], Iterator[Dict]]:
+        """Get all devices with status from enrollments (stream=True yields rows without materializing)."""
+        if stream:
+            return self._iter_all(manifest_filter)
+        if manifest_filter:
+            rows = self.db.query_all(self._sql['get_all_manifest'], (manifest_filter,))
+        else:
+            rows = self.db.query_all(self._sql['get_all'])
+        return _with_status(rows, 'last_seen')
 
+    def _iter_all(self, manifest_filter: str = None) -> Iterator[Dict]:
+        """Yield all devices with status, fetched in chunks."""
         if manifest_filter:
-            sql += " AND di.manifest LIKE %s"
-            params.append(manifest_filter)
+            rows = self.db.query_iter(self._sql['get_all_manifest'], (manifest_filter,))
+        else:
+            rows = self.db.query_iter(self._sql['get_all'])
+        for row in rows:
+            row['status'] = _device_status(row['last_seen'], row.pop('db_now'))
+            yield row
 
-        sql += " ORDER BY di.hostname"
+    def search(self, field: str, value: str, manifest_filter: str = None) -> List[Dict]:
+        """Search devices by field with optional manifest filter."""
+        # Whitelist allowed fields to prevent SQL injection
+        if field not in _ALLOWED_SEARCH_FIELDS:
+            field = 'hostname'
+
+        params = (f'%{value}%',)
+        fulltext = self._sql['search_fulltext'].get(field)
+        if fulltext and len(value) >= _FULLTEXT_MIN_LEN and '"' not in value:
+            # Phrase of ngrams finds candidate rows via index, LIKE verifies substring
+            sql, sql_manifest = fulltext
+            params = (f'"{value}"',) + params
+        else:
+            sql, sql_manifest = self._sql['search'][field]
 
-        return self.db.query_all(sql, tuple(params))
+        if manifest_filter:
+            rows = self.db.query_all(sql_manifest, params + (manifest_filter,))
+        else:
+            rows = self.db.query_all(sql, params)
+        return _with_status(rows, 'last_seen')
 
     def get_by_uuid(self, uuid: str) -> Optional[Dict]:
         """Get single device by UUID."""
-        sql = """
-            SELECT
-                di.uuid, di.serial, di.os, di.hostname, di.manifest,
-                di.account, di.dep, di.created_at, di.updated_at,
-                e.last_seen_at,
-                CASE
-                    WHEN e.last_seen_at IS NULL THEN 'offline'
-                    WHEN TIMESTAMPDIFF(MINUTE, e.last_seen_at, NOW()) <= 15 THEN 'online'
-                    WHEN TIMESTAMPDIFF(MINUTE, e.last_seen_at, NOW()) <= 60 THEN 'active'
-                    ELSE 'offline'
-                END as status
-            FROM device_inventory di
-            LEFT JOIN (
-                SELECT device_id, MAX(last_seen_at) as last_seen_at
-                FROM enrollments
-                GROUP BY device_id
-            ) e ON di.uuid = e.device_id
-            WHERE di.uuid = %s
-        """
-        return self.db.query_one(sql, (uuid,))
+        row = self.db.query_one(self._sql['get_by_uuid'], (uuid,))
+        if row:
+            _with_status([row], 'last_seen_at')
+        return row
 
     def get_hostname(self, uuid: str) -> Optional[str]:
         """Get hostname for device UUID."""
@@ -463,23 +640,71 @@ class CommandHistoryDB:
         """
         return self.db.query_all(sql, (limit,))
 
+    # Rows per cleanup DELETE - short transactions instead of one long lock/undo log
+    CLEANUP_BATCH = 5000
+
     def cleanup(self, days: int = 90) -> int:
-        """Delete history older than specified days."""
-        return self.db.execute(
-            "DELETE FROM command_history WHERE timestamp < DATE_SUB(NOW(), INTERVAL %s DAY)",
-            (days,)
-        )
+        """Delete history older than specified days (in batches), return deleted rows."""
+        deleted = 0
+        while True:
+            affected = self.db.execute(
+                "DELETE FROM command_history WHERE timestamp < DATE_SUB(NOW(), INTERVAL %s DAY) LIMIT %s",
+                (days, self.CLEANUP_BATCH)
+            )
+            deleted += affected
+            if affected < self.CLEANUP_BATCH:
+                return deleted
 
 
 # =============================================================================
 # DEVICE DETAILS CACHE
 # =============================================================================
 
+def _parse_json_field(value):
+    """Parse JSON column to dict/list, return as-is if already parsed or on error."""
+    if isinstance(value, (str, bytes, bytearray)):
+        try:
+            return json_loads(value)
+        except ValueError:
+            return value
+    return value
+
+
 class DeviceDetailsDB:
     """Device details cache (hardware, security, profiles, apps)."""
 
-    def __init__(self, db_manager: DatabaseManager):
+    # query_type -> (data column, timestamp column), whitelist for SQL column names
+    SECTIONS = {t: (f'{t}_data', f'{t}_updated_at') for t in ('hardware', 'security', 'profiles', 'apps', 'ddm')}
+
+    # OS version from hardware_data ({p} = column prefix, e.g. 'dd.')
+    OS_VERSION_EXPR = ("COALESCE(JSON_UNQUOTE(JSON_EXTRACT({p}hardware_data, '$.os_version')),"
+                       " JSON_UNQUOTE(JSON_EXTRACT({p}hardware_data, '$.OSVersion')))")
+
+    def __init__(self, db_manager: DatabaseManager, cache: Optional[DeviceCache] = None):
         self.db = db_manager
+        # In-memory cache of processed device data, invalidated on save
+        self.cache = cache
+        # Select expression for os_version of device_details joined as 'dd' - listings
+        # read the small generated column instead of every hardware_data blob
+        if self._has_os_version_column():
+            self.os_version_sql = "COALESCE(dd.os_version, '')"
+        else:
+            self.os_version_sql = f"COALESCE({self.OS_VERSION_EXPR.format(p='dd.')}, '')"
+
+    def _has_os_version_column(self) -> bool:
+        """Check for os_version generated column (created by migration 003, not at runtime)."""
+        try:
+            exists = self.db.query_value("""
+                SELECT 1 FROM information_schema.COLUMNS
+                WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'device_details'
+                  AND COLUMN_NAME = 'os_version'
+            """)
+        except Exception as e:
+            logger.warning(f"Failed to check device_details.os_version, extracting from hardware_data: {e}")
+            return False
+        if not exists:
+            logger.info("device_details.os_version missing (run migration 003), extracting from hardware_data")
+        return bool(exists)
 
     def save(self, uuid: str, query_type: str, data: str) -> bool:
         """Save device details to cache and invalidate in-memory cache."""
@@ -507,13 +732,11 @@ class DeviceDetailsDB:
         try:
             self.db.execute(sql, (uuid, data))
 
-            # Invalidate in-memory cache for this device (lazy import to avoid circular)
-            try:
-                from cache_utils import device_cache
-                device_cache.invalidate(uuid)
-                device_cache.invalidate(f"reports:{uuid}")  # Also invalidate reports cache
-            except ImportError:
-                pass  # Cache module not available
+            # Cached entries are summaries of several sections, so they are
+            # dropped rather than updated from the one section written here
+            if self.cache is not None:
+                self.cache.invalidate(uuid)
+                self.cache.invalidate(f"reports:{uuid}")  # Also invalidate reports cache
 
             return True
         except MySQLError as e:
@@ -522,44 +745,36 @@ class DeviceDetailsDB:
 
     def get(self, uuid: str, query_type: str = None) -> Optional[Dict]:
         """Get cached device details."""
-        import json
-
-        row = self.db.query_one("""
-            SELECT hardware_data, security_data, profiles_data, apps_data, ddm_data,
-                   hardware_updated_at, security_updated_at, profiles_updated_at, apps_updated_at, ddm_updated_at
-            FROM device_details WHERE uuid = %s
-        """, (uuid,))
+        section = self.SECTIONS.get(query_type) if query_type else None
+        if section:
+            # Single section - skip transferring the other JSON blobs
+            row = self.db.query_one(
+                f"SELECT {section[0]}, {section[1]} FROM device_details WHERE uuid = %s", (uuid,)
+            )
+        else:
+            row = self.db.query_one("""
+                SELECT hardware_data, security_data, profiles_data, apps_data, ddm_data,
+                       hardware_updated_at, security_updated_at, profiles_updated_at, apps_updated_at, ddm_updated_at
+                FROM device_details WHERE uuid = %s
+            """, (uuid,))
 
         if not row:
             return None
 
-        def parse_json_field(value):
-            """Parse JSON string to dict/list, return as-is if already parsed or on error."""
-            if value is None:
-                return None
-            if isinstance(value, (dict, list)):
-                return value
-            if isinstance(value, str):
-                try:
-                    return json.loads(value)
-                except (json.JSONDecodeError, TypeError):
-                    return value
-            return value
-
         if query_type:
             data_col = f"{query_type}_data"
             ts_col = f"{query_type}_updated_at"
             return {
-                'data': parse_json_field(row.get(data_col)),
+                'data': _parse_json_field(row.get(data_col)),
                 'updated_at': str(row.get(ts_col)) if row.get(ts_col) else None
             }
 
-        # Parse all JSON fields for full response
+        # Parse all JSON fields for full response (one pass over sections)
         result = {}
-        for field in ['hardware_data', 'security_data', 'profiles_data', 'apps_data', 'ddm_data']:
-            result[field] = parse_json_field(row.get(field))
-        for ts_field in ['hardware_updated_at', 'security_updated_at', 'profiles_updated_at', 'apps_updated_at', 'ddm_updated_at']:
-            result[ts_field] = str(row.get(ts_field)) if row.get(ts_field) else None
+        for data_col, ts_col in self.SECTIONS.values():
+            result[data_col] = _parse_json_field(row[data_col])
+            updated_at = row[ts_col]
+            result[ts_col] = str(updated_at) if updated_at else None
 
         return result
 
@@ -568,24 +783,56 @@ class DeviceDetailsDB:
 # REQUIRED PROFILES
 # =============================================================================
 
-class RequiredProfilesDB:
-    """Helper class for required_profiles table operations."""
+@lru_cache(maxsize=256)
+def _profile_pattern(pattern: str):
+    """Compile required profile pattern (SQL LIKE style % -> fnmatch style *) to a match function."""
+    return re.compile(fnmatch.translate(pattern.replace('%', '*'))).match
+
+
+class _TTLCached:
+    """Per-process cache of query results that change only on admin edits."""
+
+    CACHE_TTL = 300  # seconds
 
     def __init__(self, db_manager: DatabaseManager):
         self.db = db_manager
+        # key -> (expires_at, result), shared results - do not mutate
+        self._cache: Dict[Any, Tuple[float, Any]] = {}
+
+    def invalidate_cache(self):
+        """Drop cached results (call after writing the cached tables directly)."""
+        self._cache.clear()
+
+    def _cached(self, key, load):
+        """Return cached result for key, calling load() when missing or expired."""
+        entry = self._cache.get(key)
+        now = time.monotonic()
+        if entry is not None and entry[0] > now:
+            return entry[1]
+        result = load()
+        self._cache[key] = (now + self.CACHE_TTL, result)
+        return result
+
+
+class RequiredProfilesDB(_TTLCached):
+    """Helper class for required_profiles table operations."""
+
+    # Results are read on every compliance check but change only on admin edits
+    # (add/remove here, manifest rename/delete call invalidate_cache()),
+    # cached by (manifest, os) or 'grouped'
 
     def get_for_manifest(self, manifest: str, os: str) -> List[Dict[str, Any]]:
         """Get required profiles for specific manifest and OS.
         Only returns non-optional profiles (is_optional=0) for compliance checking.
         Optional profiles (is_optional=1) are only used for new device installation.
         """
-        rows = self.db.query_all("""
+        os = os.lower()
+        return self._cached((manifest, os), lambda: self.db.query_all("""
             SELECT id, profile_identifier, profile_name, match_pattern
             FROM required_profiles
             WHERE manifest = %s AND os = %s AND is_optional = 0
             ORDER BY profile_name
-        """, (manifest, os.lower()))
-        return rows or []
+        """, (manifest, os)) or [])
 
     def get_all(self) -> List[Dict[str, Any]]:
         """Get all required profiles."""
@@ -606,16 +853,13 @@ class RequiredProfilesDB:
 
     def get_grouped(self) -> Dict[str, Dict[str, List[Dict[str, Any]]]]:
         """Get required profiles grouped by manifest and os."""
-        rows = self.get_all()
+        return self._cached('grouped', self._load_grouped)
+
+    def _load_grouped(self) -> Dict[str, Dict[str, List[Dict[str, Any]]]]:
+        """Group all required profiles by manifest and os."""
         result = {}
-        for row in rows:
-            manifest = row['manifest']
-            os = row['os']
-            if manifest not in result:
-                result[manifest] = {}
-            if os not in result[manifest]:
-                result[manifest][os] = []
-            result[manifest][os].append(row)
+        for row in self.get_all():
+            result.setdefault(row['manifest'], {}).setdefault(row['os'], []).append(row)
         return result
 
     def add(self, manifest: str, os: str, profile_identifier: str, profile_name: str, match_pattern: bool = False) -> bool:
@@ -625,6 +869,7 @@ class RequiredProfilesDB:
                 INSERT INTO required_profiles (manifest, os, profile_identifier, profile_name, match_pattern)
                 VALUES (%s, %s, %s, %s, %s)
             """, (manifest, os.lower(), profile_identifier, profile_name, match_pattern))
+            self.invalidate_cache()
             return True
         except Exception as e:
             logger.error(f"Failed to add required profile: {e}")
@@ -634,6 +879,7 @@ class RequiredProfilesDB:
         """Remove a required profile by ID."""
         try:
             self.db.execute("DELETE FROM required_profiles WHERE id = %s", (profile_id,))
+            self.invalidate_cache()
             return True
         except Exception as e:
             logger.error(f"Failed to remove required profile: {e}")
@@ -651,8 +897,6 @@ class RequiredProfilesDB:
         Returns:
             Dict with required, installed, missing counts and missing_list
         """
-        import fnmatch
-
         required = self.get_for_manifest(manifest, os)
         if not required:
             return {'required': 0, 'installed': 0, 'missing': 0, 'missing_list': [], 'complete': True}
@@ -666,36 +910,22 @@ class RequiredProfilesDB:
                 if ident:
                     installed_ids.add(ident)
 
-        # Check each required profile
-        missing_list = []
-        installed_count = 0
-
-        for req in required:
-            req_id = req['profile_identifier']
-            req_name = req['profile_name']
-            is_pattern = bool(req['match_pattern'])  # MySQL returns 0/1
-
-            found = False
-            if is_pattern:
-                # Pattern matching (SQL LIKE style % -> fnmatch style *)
-                pattern = req_id.replace('%', '*')
-                for inst_id in installed_ids:
-                    if fnmatch.fnmatch(inst_id, pattern):
-                        found = True
-                        break
-            else:
-                # Exact match
-                found = req_id in installed_ids
-
-            if found:
-                installed_count += 1
-            else:
-                missing_list.append({'identifier': req_id, 'name': req_name})
+        # Exact identifiers in one set difference, patterns via compiled regex;
+        # missing_list keeps the required profiles order
+        missing_exact = {
+            req['profile_identifier'] for req in required if not req['match_pattern']
+        } - installed_ids
+        missing_list = [
+            {'identifier': req['profile_identifier'], 'name': req['profile_name']}
+            for req in required
+            if (not any(map(_profile_pattern(req['profile_identifier']), installed_ids))
+                if req['match_pattern'] else req['profile_identifier'] in missing_exact)
+        ]
 
         missing_count = len(missing_list)
         return {
             'required': len(required),
-            'installed': installed_count,
+            'installed': len(required) - missing_count,
             'missing': missing_count,
             'missing_list': missing_list,
             'complete': missing_count == 0
@@ -723,6 +953,9 @@ class UserRolesDB:
         'operator': {'level': 2, 'permissions': ['operator', 'report', 'devices', 'profiles', 'apps']},
         'report': {'level': 1, 'permissions': ['report', 'view']},
     }
+    # Flat lookups for per-request permission checks
+    _LEVELS = {role: info['level'] for role, info in ROLES.items()}
+    _PERMISSIONS = {role: info['permissions'] for role, info in ROLES.items()}
 
     def __init__(self, db_manager: DatabaseManager):
         self.db = db_manager
@@ -731,6 +964,8 @@ class UserRolesDB:
     def _ensure_table(self):
         """Create user_roles table if it doesn't exist."""
         try:
+            if 'user_roles' in self.db.existing_tables():
+                return
             self.db.execute("""
                 CREATE TABLE IF NOT EXISTS user_roles (
                     id INT AUTO_INCREMENT PRIMARY KEY,
@@ -839,13 +1074,11 @@ class UserRolesDB:
 
     def get_permissions_for_role(self, role: str) -> List[str]:
         """Get list of permissions for a role."""
-        return self.ROLES.get(role, {}).get('permissions', [])
+        return self._PERMISSIONS.get(role, [])
 
     def check_role_level(self, user_role: str, required_role: str) -> bool:
         """Check if user_role has sufficient level for required_role."""
-        user_level = self.ROLES.get(user_role, {}).get('level', 0)
-        required_level = self.ROLES.get(required_role, {}).get('level', 0)
-        return user_level >= required_level
+        return self._LEVELS.get(user_role, 0) >= self._LEVELS.get(required_role, 0)
 
 
 # =============================================================================
@@ -855,21 +1088,30 @@ class UserRolesDB:
 class LocalUsersDB:
     """Database-backed local user management for fallback authentication."""
 
-    SALT = 'nanohub-salt'
+    # Legacy hash input is '<username>:<password>:nanohub-salt'
+    SALT_BYTES = b':nanohub-salt'
+    # scrypt cost (16 MB per hash), used when argon2-cffi is not installed
+    SCRYPT_N, SCRYPT_R, SCRYPT_P = 2 ** 14, 8, 1
+    _argon2 = PasswordHasher(time_cost=2, memory_cost=64 * 1024, parallelism=2) if ARGON2_AVAILABLE else None
 
     def __init__(self, db_manager: DatabaseManager):
         self.db = db_manager
+        # Rehash on login only once password_hash can hold argon2/scrypt strings
+        self._hash_upgradable = True
         self._ensure_table()
         self._ensure_default_admin()
 
     def _ensure_table(self):
         """Create local_users table if it doesn't exist."""
         try:
+            if 'local_users' in self.db.existing_tables():
+                self._check_password_hash_width()
+                return
             self.db.execute("""
                 CREATE TABLE IF NOT EXISTS local_users (
                     id INT AUTO_INCREMENT PRIMARY KEY,
                     username VARCHAR(100) NOT NULL UNIQUE,
-                    password_hash VARCHAR(64) NOT NULL,
+                    password_hash VARCHAR(255) NOT NULL,
                     display_name VARCHAR(200) DEFAULT NULL,
                     role VARCHAR(50) NOT NULL DEFAULT 'operator',
                     manifest_filter VARCHAR(100) DEFAULT NULL,
@@ -888,6 +1130,27 @@ class LocalUsersDB:
         except Exception as e:
             logger.error(f"Failed to create local_users table: {e}")
 
+    def _check_password_hash_width(self):
+        """Disable hash upgrades on login if password_hash is still the 64-char SHA256 column.
+
+        Migration 005 widens it; legacy hashes keep working meanwhile, new
+        argon2/scrypt strings would not fit.
+        """
+        try:
+            length = self.db.query_value("""
+                SELECT CHARACTER_MAXIMUM_LENGTH FROM information_schema.COLUMNS
+                WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'local_users'
+                  AND COLUMN_NAME = 'password_hash'
+            """)
+        except Exception as e:
+            self._hash_upgradable = False
+            logger.error(f"Failed to check local_users.password_hash width, hash upgrades disabled: {e}")
+            return
+        if length is not None and length < 255:
+            self._hash_upgradable = False
+            logger.warning("local_users.password_hash is narrower than 255 (run migration 005), "
+                           "hash upgrades disabled")
+
     def _ensure_default_admin(self):
         """Seed default admin user if no users exist."""
         try:
@@ -900,7 +1163,7 @@ class LocalUsersDB:
                     VALUES (%s, %s, %s, %s, 1, %s)
                 """, (
                     'admin',
-                    self.compute_hash('admin', 'password'),
+                    self.hash_password('password'),
                     'Local Admin',
                     'admin',
                     'system'
@@ -909,48 +1172,110 @@ class LocalUsersDB:
         except Exception as e:
             logger.error(f"Failed to ensure default admin: {e}")
 
+    @staticmethod
+    def _norm(username):
+        """Normalize username (stripped, lowercase, interned)."""
+        return sys.intern(username.strip().lower())
+
+    @classmethod
+    def hash_password(cls, password):
+        """Hash password for storage ($argon2id$... or $scrypt$... string)."""
+        if cls._argon2:
+            return cls._argon2.hash(password)
+        salt = os.urandom(16)
+        key = hashlib.scrypt(password.encode(), salt=salt, n=cls.SCRYPT_N, r=cls.SCRYPT_R, p=cls.SCRYPT_P)
+        return (f"$scrypt$n={cls.SCRYPT_N},r={cls.SCRYPT_R},p={cls.SCRYPT_P}"
+                f"${base64.b64encode(salt).decode()}${base64.b64encode(key).decode()}")
+
+    @classmethod
+    def verify_password(cls, stored_hash, username, password):
+        """Check password against stored hash.
+
+        Returns (valid, needs_rehash) - needs_rehash is set for legacy SHA256
+        hashes and hashes made with other parameters or the fallback scheme.
+        """
+        if stored_hash.startswith('$argon2'):
+            if not cls._argon2:
+                logger.error("argon2 password hash found but argon2-cffi is not installed")
+                return False, False
+            try:
+                cls._argon2.verify(stored_hash, password)
+            except (VerificationError, InvalidHashError):
+                return False, False
+            return True, cls._argon2.check_needs_rehash(stored_hash)
+
+        if stored_hash.startswith('$scrypt$'):
+            try:
+                _, _, params, salt, key = stored_hash.split('$')
+                cost = dict(item.split('=') for item in params.split(','))
+                n, r, p = int(cost['n']), int(cost['r']), int(cost['p'])
+                expected = base64.b64decode(key)
+                computed = hashlib.scrypt(password.encode(), salt=base64.b64decode(salt),
+                                          n=n, r=r, p=p, dklen=len(expected))
+            except (ValueError, KeyError):
+                return False, False
+            valid = hmac.compare_digest(computed, expected)
+            return valid, valid and (cls._argon2 is not None or (n, r, p) != (cls.SCRYPT_N, cls.SCRYPT_R, cls.SCRYPT_P))
+
+        # Legacy unsalted SHA256 hex
+        valid = hmac.compare_digest(stored_hash, cls.compute_hash(username, password))
+        return valid, valid
+
     @staticmethod
     def compute_hash(username, password):
-        """Compute SHA256 hash for authentication."""
-        import hashlib
-        return hashlib.sha256(f'{username}:{password}:{LocalUsersDB.SALT}'.encode()).hexdigest()
+        """Compute legacy SHA256 hash (verification of pre-argon2/scrypt passwords only)."""
+        h = hashlib.sha256(username.encode())
+        h.update(b':')
+        h.update(password.encode())
+        h.update(LocalUsersDB.SALT_BYTES)
+        return h.hexdigest()
 
     def authenticate(self, username, password):
         """Authenticate local user. Returns user row dict or None."""
         if not username or not password:
             return None
 
-        username = username.strip().lower()
-        password_hash = self.compute_hash(username, password)
+        username = self._norm(username)
 
         try:
+            # KDF runs with no pooled connection held - SELECT, verify, then UPDATE
             row = self.db.query_one("""
                 SELECT id, username, password_hash, display_name, role,
                        manifest_filter, is_active, must_change_password, last_login, notes
                 FROM local_users
                 WHERE username = %s AND is_active = 1
             """, (username,))
-
             if not row:
                 return None
 
-            if row['password_hash'] != password_hash:
+            valid, needs_rehash = self.verify_password(row['password_hash'], username, password)
+            if not valid:
                 logger.warning(f"Invalid password for local user: {username}")
                 return None
 
-            # Update last_login
             self.db.execute(
                 "UPDATE local_users SET last_login = NOW() WHERE username = %s",
                 (username,)
             )
-
-            logger.info(f"Local user {username} authenticated successfully")
-            return row
-
         except Exception as e:
             logger.error(f"Local user authentication error: {e}")
             return None
 
+        # Upgrade legacy/outdated hash while the plaintext is at hand - best effort,
+        # a failure must never turn a valid login into a rejected one
+        if needs_rehash and self._hash_upgradable:
+            try:
+                self.db.execute(
+                    "UPDATE local_users SET password_hash = %s WHERE username = %s",
+                    (self.hash_password(password), username)
+                )
+                logger.info(f"Password hash upgraded for local user: {username}")
+            except Exception as e:
+                logger.warning(f"Password hash upgrade failed for local user {username}: {e}")
+
+        logger.info(f"Local user {username} authenticated successfully")
+        return row
+
     def get_user(self, username):
         """Get single user by username."""
         return self.db.query_one("""
@@ -958,7 +1283,7 @@ class LocalUsersDB:
                    is_active, must_change_password, created_at, updated_at,
                    created_by, last_login, notes
             FROM local_users WHERE username = %s
-        """, (username.lower(),))
+        """, (self._norm(username),))
 
     def get_all_users(self, include_inactive=False):
         """Get all local users."""
@@ -980,8 +1305,8 @@ class LocalUsersDB:
     def create_user(self, username, password, role='operator', display_name=None,
                     manifest_filter=None, must_change_password=True, created_by=None, notes=None):
         """Create a new local user."""
-        username = username.strip().lower()
-        password_hash = self.compute_hash(username, password)
+        username = self._norm(username)
+        password_hash = self.hash_password(password)
 
         try:
             self.db.execute("""
@@ -1000,7 +1325,7 @@ class LocalUsersDB:
     def update_user(self, username, role=None, display_name=None,
                     manifest_filter=None, is_active=None, notes=None):
         """Update local user fields (not password)."""
-        username = username.strip().lower()
+        username = self._norm(username)
         updates = {}
         if role is not None:
             updates['role'] = role
@@ -1026,8 +1351,8 @@ class LocalUsersDB:
 
     def change_password(self, username, new_password):
         """Change password and clear must_change_password flag."""
-        username = username.strip().lower()
-        password_hash = self.compute_hash(username, new_password)
+        username = self._norm(username)
+        password_hash = self.hash_password(new_password)
 
         try:
             self.db.execute("""
@@ -1042,8 +1367,8 @@ class LocalUsersDB:
 
     def reset_password(self, username, new_password, force_change=True):
         """Admin password reset. Sets must_change_password flag."""
-        username = username.strip().lower()
-        password_hash = self.compute_hash(username, new_password)
+        username = self._norm(username)
+        password_hash = self.hash_password(new_password)
 
         try:
             self.db.execute("""
@@ -1058,7 +1383,7 @@ class LocalUsersDB:
 
     def delete_user(self, username):
         """Delete a local user. Cannot delete the admin user."""
-        username = username.strip().lower()
+        username = self._norm(username)
         if username == 'admin':
             logger.warning("Cannot delete the default admin user")
             return False
@@ -1086,6 +1411,8 @@ class AppSettingsDB:
     def _ensure_table(self):
         """Create app_settings table if it doesn't exist."""
         try:
+            if 'app_settings' in self.db.existing_tables():
+                return
             self.db.execute("""
                 CREATE TABLE IF NOT EXISTS app_settings (
                     id INT AUTO_INCREMENT PRIMARY KEY,
@@ -1144,14 +1471,37 @@ class AppSettingsDB:
 # DDM COMPLIANCE
 # =============================================================================
 
-class DDMComplianceDB:
+def _canonicalize_ddm(status) -> Dict[str, Tuple[Any, Any]]:
+    """Map device DDM status list to {identifier: (active, valid)}.
+
+    Webhook cache (device_details.ddm_data) uses lowercase keys, raw DDM status
+    capitalized ones. valid stays raw ('valid'/'unknown' or bool/int).
+    """
+    canonical = {}
+    if not isinstance(status, list):
+        return canonical
+    for decl in status:
+        try:
+            ident = decl['identifier']
+            entry = (decl.get('active', False), decl.get('valid', False))
+        except (KeyError, TypeError):
+            if not isinstance(decl, dict):
+                continue
+            ident = decl.get('Identifier', '')
+            entry = (decl.get('Active', False), decl.get('Valid', False))
+        if ident:
+            canonical[ident] = entry
+    return canonical
+
+
+class DDMComplianceDB(_TTLCached):
     """Helper class for DDM compliance checking."""
 
-    def __init__(self, db_manager: DatabaseManager):
-        self.db = db_manager
+    # Required sets with declarations are cached by (manifest, os), set and
+    # required set endpoints in routes/ddm.py call invalidate_cache()
 
     def get_required_set(self, manifest: str, os: str) -> Optional[Dict[str, Any]]:
-        """Get required DDM set for a manifest+os combination."""
+        """Get required DDM set for a manifest+os combination (DB errors are logged and raised)."""
         if not manifest or not os:
             return None
         try:
@@ -1162,11 +1512,12 @@ class DDMComplianceDB:
                 WHERE r.manifest = %s AND r.os = %s
             """, (manifest, os.lower()))
             return row
-        except:
-            return None
+        except mysql.connector.Error as e:
+            logger.warning(f"Failed to load required DDM set for {manifest}/{os}: {e}")
+            raise
 
     def get_set_declarations(self, set_id: int) -> List[Dict[str, Any]]:
-        """Get all declarations in a set."""
+        """Get all declarations in a set (DB errors are logged and raised)."""
         try:
             rows = self.db.query_all("""
                 SELECT d.id, d.identifier, d.type
@@ -1176,8 +1527,45 @@ class DDMComplianceDB:
                 ORDER BY d.identifier
             """, (set_id,))
             return rows or []
-        except:
-            return []
+        except mysql.connector.Error as e:
+            logger.warning(f"Failed to load declarations of DDM set {set_id}: {e}")
+            raise
+
+    def get_required_set_with_declarations(self, manifest: str, os: str) -> Optional[Dict[str, Any]]:
+        """Get required DDM set for manifest+os with its declarations in one query.
+
+        Returns dict with set_id, set_name, declarations (id, identifier,
+        type ordered by identifier) and frozenset of their identifiers,
+        None if no set is required.
+        """
+        if not manifest or not os:
+            return None
+        os = os.lower()
+        return self._cached((manifest, os), lambda: self._load_required_set(manifest, os))
+
+    def _load_required_set(self, manifest: str, os: str) -> Optional[Dict[str, Any]]:
+        rows = self.db.query_all("""
+            SELECT r.set_id, s.name as set_name, d.id, d.identifier, d.type
+            FROM ddm_required_sets r
+            JOIN ddm_sets s ON r.set_id = s.id
+            LEFT JOIN ddm_set_declarations sd ON sd.set_id = r.set_id
+            LEFT JOIN ddm_declarations d ON d.id = sd.declaration_id
+            WHERE r.manifest = %s AND r.os = %s
+            ORDER BY d.identifier
+        """, (manifest, os))
+        if not rows:
+            return None
+        # Empty set yields one row without declaration
+        declarations = [
+            {'id': row['id'], 'identifier': row['identifier'], 'type': row['type']}
+            for row in rows if row['id'] is not None
+        ]
+        return {
+            'set_id': rows[0]['set_id'],
+            'set_name': rows[0]['set_name'],
+            'declarations': declarations,
+            'identifiers': frozenset(decl['identifier'] for decl in declarations),
+        }
 
     def check_device_ddm(self, manifest: str, os: str, ddm_status: Optional[Dict] = None) -> Dict[str, Any]:
         """
@@ -1191,7 +1579,90 @@ class DDMComplianceDB:
         Returns:
             Dict with required, active, valid counts and status
         """
-        required_set = self.get_required_set(manifest, os)
+        try:
+            required_set = self.get_required_set_with_declarations(manifest, os)
+        except mysql.connector.Error as e:
+            logger.warning(f"DDM compliance check without required set for {manifest}/{os}: {e}")
+            required_set = None
+        return self._evaluate_ddm(required_set, ddm_status)
+
+    def check_devices_ddm_bulk(self, devices: List[Tuple[str, str, Optional[List]]]) -> List[Dict[str, Any]]:
+        """Check DDM compliance for many devices with one query for all their required sets.
+
+        Args:
+            devices: (manifest, os, ddm_status) per device
+
+        Returns:
+            check_device_ddm() results in input order
+        """
+        try:
+            required_sets = self.get_required_sets_with_declarations((m, o) for m, o, _ in devices)
+        except mysql.connector.Error as e:
+            logger.warning(f"DDM compliance check without required sets for {len(devices)} devices: {e}")
+            required_sets = {}
+        return [
+            self._evaluate_ddm(required_sets.get((manifest, (os or '').lower())), ddm_status)
+            for manifest, os, ddm_status in devices
+        ]
+
+    def get_required_sets_with_declarations(self, pairs) -> Dict[Tuple[str, str], Dict[str, Any]]:
+        """Batch variant of get_required_set_with_declarations keyed by (manifest, os).
+
+        Cached pairs are served from cache, the rest is loaded with one query.
+        """
+        result = {}
+        now = time.monotonic()
+        missing = set()
+        for manifest, os in pairs:
+            if not manifest or not os:
+                continue
+            key = (manifest, os.lower())
+            entry = self._cache.get(key)
+            if entry is not None and entry[0] > now:
+                if entry[1] is not None:
+                    result[key] = entry[1]
+            else:
+                missing.add(key)
+        if not missing:
+            return result
+        loaded = self._load_required_sets(sorted(missing))
+        expires_at = now + self.CACHE_TTL
+        for key in missing:
+            self._cache[key] = (expires_at, loaded.get(key))
+        result.update(loaded)
+        return result
+
+    def _load_required_sets(self, pairs: List[Tuple[str, str]]) -> Dict[Tuple[str, str], Dict[str, Any]]:
+        rows = self.db.query_all(f"""
+            SELECT r.manifest, r.os, r.set_id, s.name as set_name, d.id, d.identifier, d.type
+            FROM ddm_required_sets r
+            JOIN ddm_sets s ON r.set_id = s.id
+            LEFT JOIN ddm_set_declarations sd ON sd.set_id = r.set_id
+            LEFT JOIN ddm_declarations d ON d.id = sd.declaration_id
+            WHERE (r.manifest, r.os) IN ({', '.join(['(%s, %s)'] * len(pairs))})
+            ORDER BY d.identifier
+        """, tuple(value for pair in pairs for value in pair))
+        # Collation compares case-insensitively, map rows back to requested keys
+        keys = {(manifest.lower(), os): (manifest, os) for manifest, os in pairs}
+        result = {}
+        for row in rows:
+            key = keys.get((row['manifest'].lower(), row['os'].lower()), (row['manifest'], row['os']))
+            required_set = result.setdefault(key, {
+                'set_id': row['set_id'],
+                'set_name': row['set_name'],
+                'declarations': [],
+            })
+            if row['id'] is not None:
+                required_set['declarations'].append(
+                    {'id': row['id'], 'identifier': row['identifier'], 'type': row['type']}
+                )
+        for required_set in result.values():
+            required_set['identifiers'] = frozenset(decl['identifier'] for decl in required_set['declarations'])
+        return result
+
+    @staticmethod
+    def _evaluate_ddm(required_set: Optional[Dict[str, Any]], ddm_status: Optional[List]) -> Dict[str, Any]:
+        """Compare device DDM status with required set (see check_device_ddm)."""
         if not required_set:
             return {
                 'required': 0,
@@ -1202,9 +1673,8 @@ class DDMComplianceDB:
                 'missing_list': []
             }
 
-        set_id = required_set['set_id']
         set_name = required_set['set_name']
-        required_declarations = self.get_set_declarations(set_id)
+        required_declarations = required_set['declarations']
 
         if not required_declarations:
             return {
@@ -1222,73 +1692,67 @@ class DDMComplianceDB:
         missing_list = []
 
         # Check against device DDM status if provided
-        if ddm_status and isinstance(ddm_status, list):
-            status_map = {}
-            for decl in ddm_status:
-                if isinstance(decl, dict):
-                    ident = decl.get('identifier', decl.get('Identifier', ''))
-                    if ident:
-                        status_map[ident] = {
-                            'active': decl.get('active', decl.get('Active', False)),
-                            'valid': decl.get('valid', decl.get('Valid', False))
-                        }
+        status_map = _canonicalize_ddm(ddm_status)
+
+        # Declarations not reported by device at all are assumed to apply
+        # (not applied yet or device hasn't synced)
+        unreported = required_set['identifiers'] - status_map.keys()
 
+        if len(unreported) < required_count:
             # Count only declarations that are actually applied (in activation or management type)
             # Skip declarations with valid='unknown' - they're in set but not in activation
-            applicable_count = 0
+            applicable_count = len(unreported)
 
             for req in required_declarations:
                 req_id = req['identifier']
                 req_type = req.get('type', '')
+                if req_id in unreported:
+                    missing_list.append({'identifier': req_id, 'active': False, 'valid': False, 'type': req_type})
+                    continue
                 # Management types (com.apple.management.*) don't need to be "active"
                 # They auto-apply via set assignment, not via activation
                 is_management_type = req_type.startswith('com.apple.management.')
                 # Activation declarations are always applicable
                 is_activation_type = req_type.startswith('com.apple.activation.')
 
-                if req_id in status_map:
-                    status = status_map[req_id]
-                    status_valid_raw = status['valid']
-
-                    # Normalize valid value (can be string 'valid'/'unknown' or bool/int 1/0)
-                    # is_valid_ok = True if valid='valid' or valid=True or valid=1
-                    # is_unknown = True if valid='unknown' or valid=False or valid=0
-                    is_valid_ok = status_valid_raw == 'valid' or status_valid_raw is True or status_valid_raw == 1
-                    is_unknown = status_valid_raw == 'unknown' or status_valid_raw is False or status_valid_raw == 0 or status_valid_raw is None
-
-                    # Skip declarations not in activation (valid=unknown means not applied)
-                    # These are in set but not configured to apply
-                    if is_unknown and not is_management_type and not is_activation_type:
-                        continue  # Don't count as required
-
-                    applicable_count += 1
-
-                    if status['active']:
-                        active_count += 1
-                    if is_valid_ok:
-                        valid_count += 1
-
-                    # For management types: only check valid (active=0 is expected)
-                    # For activation/configuration types: check both active and valid
-                    if is_management_type:
-                        is_ok = is_valid_ok
-                    else:
-                        is_ok = status['active'] and is_valid_ok
-
-                    if not is_ok:
-                        missing_list.append({'identifier': req_id, 'active': status['active'], 'valid': status_valid_raw, 'type': req_type})
+                status_active, status_valid_raw = status_map[req_id]
+
+                # Normalize valid value (can be string 'valid'/'unknown' or bool/int 1/0)
+                # is_valid_ok = True if valid='valid' or valid=True or valid=1
+                # is_unknown = True if valid='unknown' or valid=False or valid=0
+                is_valid_ok = status_valid_raw == 'valid' or status_valid_raw is True or status_valid_raw == 1
+                is_unknown = status_valid_raw == 'unknown' or status_valid_raw is False or status_valid_raw == 0 or status_valid_raw is None
+
+                # Skip declarations not in activation (valid=unknown means not applied)
+                # These are in set but not configured to apply
+                if is_unknown and not is_management_type and not is_activation_type:
+                    continue  # Don't count as required
+
+                applicable_count += 1
+
+                if status_active:
+                    active_count += 1
+                if is_valid_ok:
+                    valid_count += 1
+
+                # For management types: only check valid (active=0 is expected)
+                # For activation/configuration types: check both active and valid
+                if is_management_type:
+                    is_ok = is_valid_ok
                 else:
-                    # Declaration not reported by device at all
-                    # Could be not applied or device hasn't synced
-                    applicable_count += 1  # Assume it should be applied
-                    missing_list.append({'identifier': req_id, 'active': False, 'valid': False, 'type': req_type})
+                    is_ok = status_active and is_valid_ok
+
+                if not is_ok:
+                    missing_list.append({'identifier': req_id, 'active': status_active, 'valid': status_valid_raw, 'type': req_type})
 
             # Use applicable_count instead of required_count for compliance
             required_count = applicable_count
         else:
-            # No status data - all required declarations are "missing"
-            for req in required_declarations:
-                missing_list.append({'identifier': req['identifier'], 'active': False, 'valid': False, 'type': req.get('type', '')})
+            # No status data (or none of the set reported) - all required declarations are "missing"
+            missing_list = [
+                {'identifier': req['identifier'], 'active': False, 'valid': False, 'type': req.get('type', '')}
+                for req in required_declarations
+            ]
 
         return {
             'required': required_count,
@@ -1310,7 +1774,7 @@ db = DatabaseManager()
 # Helper instances
 devices = DeviceDB(db)
 command_history = CommandHistoryDB(db)
-device_details = DeviceDetailsDB(db)
+device_details = DeviceDetailsDB(db, device_cache)
 required_profiles = RequiredProfilesDB(db)
 ddm_compliance = DDMComplianceDB(db)
 user_roles = UserRolesDB(db)
@@ -0,0 +1,120 @@
+#!/opt/nanohub/venv/bin/python3
+"""
+NanoHUB Command Registry Export CLI
+===================================
+
+Write the command registry as static JSON (same payload as /api/commands)
+or its JSON Schema, so external tooling can consume it without a live panel.
+
+Usage:
+    python3 export_commands.py commands [--role ROLE] [-o FILE]   # Registry payload for role
+    python3 export_commands.py schema [-o FILE]                   # JSON Schema of a command
+
+Examples:
+    python3 export_commands.py commands --role operator -o commands.json
+    python3 export_commands.py schema -o command_registry.schema.json
+"""
+
+import sys
+import json
+import argparse
+
+import command_registry as registry
+
+_OPTION_SCHEMA = {
+    'type': 'object',
+    'properties': {'value': {'type': 'string'}, 'label': {'type': 'string'}},
+    'required': ['value', 'label'],
+}
+
+
+def build_schema():
+    """Build JSON Schema for a single command entry from the registry validation rules."""
+    param_schema = {
+        'type': 'object',
+        'properties': {
+            'name': {'type': 'string'},
+            'label': {'type': 'string'},
+            'type': {'enum': list(registry._PARAM_TYPES)},
+            'required': {'type': 'boolean'},
+            'options': {'type': 'array', 'items': _OPTION_SCHEMA},
+            'default': {'type': 'string'},
+            'placeholder': {'type': 'string'},
+            'help': {'type': 'string'},
+            'filter_os': {'type': 'string'},
+        },
+        'required': list(registry._REQUIRED_PARAM_KEYS),
+        'additionalProperties': False,
+    }
+    return {
+        '$schema': 'https://json-schema.org/draft/2020-12/schema',
+        'title': 'NanoHUB command',
+        'type': 'object',
+        'properties': {
+            'name': {'type': 'string'},
+            'category': {'enum': list(registry.CATEGORIES)},
+            'description': {'type': 'string'},
+            'script': {'type': 'string'},
+            'script_dir': {'type': 'string'},
+            'parameters': {'type': 'array', 'items': param_schema},
+            'dangerous': {'type': 'boolean'},
+            'danger_level': {'type': 'string'},
+            'min_role': {'enum': list(registry._VALID_MIN_ROLES)},
+            'bulk_supported': {'type': 'boolean'},
+            'has_device_autofill': {'type': 'boolean'},
+        },
+        'required': list(registry._REQUIRED_COMMAND_KEYS),
+        'additionalProperties': False,
+    }
+
+
+def _write(data, output):
+    """Write bytes to file or stdout."""
+    if output:
+        with open(output, 'wb') as f:
+            f.write(data)
+        print(f"Written {len(data)} bytes to {output}", file=sys.stderr)
+    else:
+        sys.stdout.buffer.write(data)
+
+
+def cmd_commands(args):
+    """Export registry payload for role."""
+    _write(registry.get_commands_json(args.role), args.output)
+
+
+def cmd_schema(args):
+    """Export JSON Schema of command entries."""
+    _write(json.dumps(build_schema(), indent=2, sort_keys=True).encode('utf-8'), args.output)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='NanoHUB Command Registry Export',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__
+    )
+    subparsers = parser.add_subparsers(dest='command', help='Commands')
+
+    # Commands payload
+    commands_parser = subparsers.add_parser('commands', help='Export registry JSON for a role')
+    commands_parser.add_argument('--role', default='admin', help='Role (admin, bel-admin, operator, report)')
+    commands_parser.add_argument('-o', '--output', help='Output file (default: stdout)')
+    commands_parser.set_defaults(func=cmd_commands)
+
+    # Schema
+    schema_parser = subparsers.add_parser('schema', help='Export JSON Schema of a command entry')
+    schema_parser.add_argument('-o', '--output', help='Output file (default: stdout)')
+    schema_parser.set_defaults(func=cmd_schema)
+
+    args = parser.parse_args()
+
+    if not args.command:
+        parser.print_help()
+        sys.exit(1)
+
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
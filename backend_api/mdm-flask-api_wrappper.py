@@ -9,6 +9,7 @@ Refactored to use centralized utility modules.
 from flask import Flask, request, jsonify
 import subprocess
 import json
+import ast
 import os
 import re
 import time
@@ -26,6 +27,125 @@ app = Flask(__name__)
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger('mdm_flask_api')
 
+# Key/value pairs of an update dict as logged by the webhook ({'Version': '14.2', 'IsCritical': False, ...})
+_UPDATE_KV_RE = re.compile(
+    r"'(ProductName|ProductKey|Version|HumanReadableName|IsCritical|RestartRequired)'\s*:\s*"
+    r"(?:'([^']*)'|(True|False|\d+))"
+)
+_PROFILE_RE = re.compile(r".*\[([0-9]+)\]\s+([^\s]+)\s+\(([^)]+)\)\s+[–\-—]\s+(.+)")
+_APP_RE = re.compile(r".*\[(\d+)\]\s+(.+?)\s+\((.+?)\)\s+v([^\s]+)")
+_COMMAND_UUID_RE = re.compile(r'[a-f0-9\-]{36}')
+_COMMAND_UUID_PAIR_RE = re.compile(r'([a-f0-9\-]{36})\|([a-f0-9\-]{36})')
+
+
+def _format_capacity(value):
+    """Format capacity (GB or bytes) as GB string."""
+    try:
+        capacity = float(value)
+    except ValueError:
+        return value
+    if capacity > 1000:  # Probably bytes
+        capacity = capacity / (1024**3)
+    return f"{capacity:.2f} GB"
+
+
+def _format_battery(value):
+    """Format battery level (0-1 or percent) as percent string."""
+    try:
+        battery = float(value)
+    except ValueError:
+        return value
+    if battery <= 1.0:
+        battery = battery * 100
+    return f"{battery:.0f}%"
+
+
+# Webhook log field name -> result key, per extractor
+_CUSTOM_RESULT_FIELDS = {
+    "Device": "device",
+    "Command": "command",
+    "Status": "status",
+    "Timestamp": "timestamp",
+}
+
+_DEVICE_INFO_FIELDS = {
+    "DeviceName": "device_name",
+    "OSVersion": "os_version",
+    "SerialNumber": "serial_number",
+    "Status": "status",
+}
+
+_SYSTEM_REPORT_FIELDS = {
+    "DeviceName": "device_name",
+    "OSVersion": "os_version",
+    "BuildVersion": "build_version",
+    "ModelName": "model_name",
+    "Model": "model",
+    "ProductName": "product_name",
+    "SerialNumber": "serial_number",
+    "WiFiMAC": "wifi_mac",
+    "BluetoothMAC": "bluetooth_mac",
+    "EthernetMAC": "ethernet_mac",
+    "HostName": "hostname",
+    "LocalHostName": "local_hostname",
+    "CellularTechnology": "cellular_technology",
+    "IMEI": "imei",
+    "MEID": "meid",
+    "ModemFirmwareVersion": "modem_firmware",
+    "IsSupervised": "is_supervised",
+    "SystemIntegrityProtectionEnabled": "sip_enabled",
+    "IsActivationLockEnabled": "activation_lock",
+    "IsDeviceLocatorServiceEnabled": "find_my_enabled",
+    "IsCloudBackupEnabled": "cloud_backup",
+    "IsMDMLostModeEnabled": "mdm_lost_mode",
+    "IsDoNotDisturbInEffect": "dnd_enabled",
+    "Status": "status",
+}
+
+# Fields whose value is reformatted: field name -> (result key, formatter)
+_SYSTEM_REPORT_PARSED_FIELDS = {
+    "DeviceCapacity": ("device_capacity", _format_capacity),
+    "AvailableDeviceCapacity": ("available_capacity", _format_capacity),
+    "BatteryLevel": ("battery_level", _format_battery),
+}
+
+# FirewallSettings dict key -> result key
+_FIREWALL_FIELDS = {
+    "FirewallEnabled": "firewall_enabled",
+    "BlockAllIncoming": "firewall_block_all",
+    "StealthMode": "firewall_stealth",
+}
+
+_SECURE_BOOT_LEVELS = ("full", "medium", "none")
+
+_SECURITY_FIELDS = {
+    "FDE_Enabled": "filevault_enabled",
+    "FDE_HasPersonalRecoveryKey": "filevault_has_recovery_key",
+    "FDE_HasInstitutionalRecoveryKey": "filevault_has_institutional_key",
+    "RemoteDesktopEnabled": "remote_desktop_enabled",
+    "SystemIntegrityProtectionEnabled": "sip_enabled",
+    "BootstrapTokenAllowedForAuthentication": "bootstrap_token_auth",
+    "IsRecoveryLockEnabled": "recovery_lock_enabled",
+}
+
+
+def _literal_dict(value):
+    """Parse dict logged by the webhook (Python repr), {} if not a plain literal dict."""
+    try:
+        parsed = ast.literal_eval(value)
+    except (ValueError, SyntaxError):
+        return {}
+    return parsed if isinstance(parsed, dict) else {}
+
+
+def _log_field(row):
+    """Split webhook log line ('<time> [INFO]   Key: value') into (key, value), ('', '') if none."""
+    _, sep, content = row.partition('] ')
+    key, sep, value = (content if sep else row).partition(':')
+    if not sep:
+        return '', ''
+    return key.strip(), value.strip()
+
 
 # =============================================================================
 # LEGACY COMPATIBILITY FUNCTIONS
@@ -59,7 +179,10 @@ def universal_device_search(source, field, value):
 
 def universal_webhook_poll(criteria, pattern_type="uuid", logfile=None,
                            initial_sleep=5, max_polls=10, poll_wait=1, window=1000):
-    """Poll webhook for command result (legacy compatibility)."""
+    """Poll webhook for command result (legacy compatibility).
+
+    Returns iterator over block lines (empty when no result), extractors take it directly.
+    """
     response = poller.poll_for_command(
         criteria,
         initial_sleep=initial_sleep,
@@ -68,36 +191,132 @@ def universal_webhook_poll(criteria, pattern_type="uuid", logfile=None,
         window=window
     )
     if response:
-        return response.raw.split('\n')
-    return []
+        return _iter_lines(response.raw)
+    return iter(())
+
+
+def _iter_lines(text):
+    """Yield lines of text (split on newline) without building a list."""
+    start = 0
+    while True:
+        end = text.find('\n', start)
+        if end == -1:
+            yield text[start:]
+            return
+        yield text[start:end]
+        start = end + 1
+
+
+_MARKER_EVENT = b'=== MDM Event ==='
+_MARKER_RESULT = b'=== COMMAND RESULT ==='
+
+
+def _read_log_tail(path, window):
+    """Read last `window` lines of log as bytes without loading the whole file.
+
+    Returns (data, pos), pos = (inode, size) for _read_log_appended.
+    """
+    with open(path, 'rb') as f:
+        st = os.fstat(f.fileno())
+        size = st.st_size
+        chunk = window * Config.WEBHOOK_POLL_LINE_BYTES
+        while True:
+            offset = max(0, size - chunk)
+            f.seek(offset)
+            lines = f.read(size - offset).splitlines(keepends=True)
+            # First line after seek may be partial - need one spare
+            if offset and len(lines) <= window:
+                chunk *= 2
+                continue
+            break
+    if offset:
+        lines = lines[1:]
+    return b''.join(lines[-window:]), (st.st_ino, size)
+
+
+def _read_log_appended(path, pos):
+    """Read bytes appended to log since pos of previous read.
+
+    Returns (data, pos), data is None when log was rotated or truncated.
+    """
+    inode, size = pos
+    with open(path, 'rb') as f:
+        st = os.fstat(f.fileno())
+        if st.st_ino != inode or st.st_size < size:
+            return None, pos
+        f.seek(size)
+        data = f.read(st.st_size - size)
+    return data, (inode, size + len(data))
+
+
+def _last_block_start(data):
+    """Offset of the last (possibly still growing) block or line in log bytes."""
+    start = data.rfind(b'\n', 0, len(data) - 1) + 1
+    marker = max(data.rfind(_MARKER_EVENT), data.rfind(_MARKER_RESULT))
+    if marker != -1:
+        start = min(start, data.rfind(b'\n', 0, marker) + 1)
+    return start
+
+
+def _trim_lines(data, window):
+    """Drop leading lines so at most `window` lines remain, returns (data, bytes dropped)."""
+    excess = data.count(b'\n') + (not data.endswith(b'\n')) - window
+    cut = 0
+    for _ in range(excess):
+        cut = data.index(b'\n', cut) + 1
+    return data[cut:], cut
+
+
+def _find_result_block(data, udid_upper, cmd_marker, lo=0):
+    """Find newest COMMAND RESULT block for device and command in log bytes, None if missing.
+
+    Blocks start at the line holding an event/result marker and run to the next one,
+    only blocks starting at offset lo or later are checked.
+    """
+    idx = data.rfind(_MARKER_RESULT, lo)
+    while idx != -1:
+        start = data.rfind(b'\n', 0, idx) + 1
+        end = len(data)
+        for marker in (_MARKER_EVENT, _MARKER_RESULT):
+            nxt = data.find(marker, idx + len(_MARKER_RESULT), end)
+            if nxt != -1:
+                end = data.rfind(b'\n', 0, nxt) + 1
+        block = data[start:end]
+        if cmd_marker in block and udid_upper in block.upper():
+            return block
+        idx = data.rfind(_MARKER_RESULT, lo, start)
+    return None
 
 
 def poll_custom_command_result(udid, command_type, logfile=None,
                                initial_sleep=30, max_polls=10, poll_wait=2, window=1000):
     """Poll webhook for custom agent command results."""
+    udid_upper = udid.upper().encode()
+    cmd_marker = f'Command: {command_type}'.encode()
     time.sleep(initial_sleep)
 
+    # Later polls only read and search what was appended since the previous one
+    data, pos = None, None
     for poll_attempt in range(max_polls):
         try:
-            with open(Config.WEBHOOK_LOG_PATH, "r") as f:
-                lines = f.readlines()[-window:]
-
-            blocks = []
-            block = []
-            for line in lines:
-                if '=== MDM Event ===' in line or '=== COMMAND RESULT ===' in line:
-                    if block:
-                        blocks.append(block)
-                    block = []
-                block.append(line)
-            if block:
-                blocks.append(block)
-
-            for blk in reversed(blocks):
-                block_text = ''.join(blk)
-                if '=== COMMAND RESULT ===' in block_text and udid.upper() in block_text.upper():
-                    if f'Command: {command_type}' in block_text:
-                        return list(blk)
+            appended = None
+            if pos is not None:
+                appended, pos = _read_log_appended(Config.WEBHOOK_LOG_PATH, pos)
+            if appended is None:
+                data, pos = _read_log_tail(Config.WEBHOOK_LOG_PATH, window)
+                lo = 0
+            elif appended:
+                # Blocks before the last one were complete and checked already
+                lo = _last_block_start(data)
+                data, cut = _trim_lines(data + appended, window)
+                lo = max(0, lo - cut)
+            else:
+                time.sleep(poll_wait)
+                continue
+
+            block = _find_result_block(data, udid_upper, cmd_marker, lo)
+            if block is not None:
+                return block.decode('utf-8', errors='replace').splitlines(keepends=True)
 
             time.sleep(poll_wait)
         except Exception as e:
@@ -115,14 +334,10 @@ def extract_custom_command_result(block):
     """Extract result from custom command response."""
     result = {}
     for line in block:
-        if 'Device:' in line:
-            result['device'] = line.split('Device:')[1].strip()
-        if 'Command:' in line:
-            result['command'] = line.split('Command:')[1].strip()
-        if 'Status:' in line and 'exit code' in line:
-            result['status'] = line.split('Status:')[1].strip()
-        if 'Timestamp:' in line:
-            result['timestamp'] = line.split('Timestamp:')[1].strip()
+        key, value = _log_field(line.strip())
+        field = _CUSTOM_RESULT_FIELDS.get(key)
+        if field and (field != 'status' or 'exit code' in value):
+            result[field] = value
     return result
 
 
@@ -132,41 +347,45 @@ def extract_os_updates(block):
     status = ''
     for l in block:
         row = l.strip() if isinstance(l, str) else str(l).strip()
-        if "Status:" in row:
-            status = row.split("Status:", 1)[1].strip()
+        key, value = _log_field(row)
+        if key == "Status":
+            status = value
         if '{' in row and 'ProductKey' in row:
-            try:
-                raw = row.split("{", 1)[1].rstrip("}").strip()
-                d = eval("{" + raw + "}")
-                updates.append({
-                    "ProductName": d.get("ProductName") or d.get("HumanReadableName") or d.get("Version") or "",
-                    "ProductKey": d.get("ProductKey", ""),
-                    "Version": d.get("Version", ""),
-                    "IsCritical": d.get("IsCritical", False),
-                    "RestartRequired": d.get("RestartRequired", False),
-                    "Status": status
-                })
-            except Exception:
+            d = {}
+            for m in _UPDATE_KV_RE.finditer(row.partition("{")[2]):
+                key, text, literal = m.groups()
+                if text is not None:
+                    d[key] = text
+                elif literal in ('True', 'False'):
+                    d[key] = literal == 'True'
+                else:
+                    d[key] = int(literal)
+            if "ProductKey" not in d:
                 continue
+            updates.append({
+                "ProductName": d.get("ProductName") or d.get("HumanReadableName") or d.get("Version") or "",
+                "ProductKey": d.get("ProductKey", ""),
+                "Version": d.get("Version", ""),
+                "IsCritical": d.get("IsCritical", False),
+                "RestartRequired": d.get("RestartRequired", False),
+                "Status": status
+            })
     return updates
 
 
 def extract_device_info(block):
     """Extract device info from webhook block."""
     info = {}
+    first = None
     for l in block:
-        row = l.strip() if isinstance(l, str) else str(l).strip()
-        if "DeviceName:" in row:
-            info["device_name"] = row.split("DeviceName:", 1)[1].strip()
-        if "OSVersion:" in row:
-            info["os_version"] = row.split("OSVersion:", 1)[1].strip()
-        if "SerialNumber:" in row:
-            info["serial_number"] = row.split("SerialNumber:", 1)[1].strip()
-        if "Status:" in row:
-            info["status"] = row.split("Status:", 1)[1].strip()
-    if block:
-        parts = block[0].split(' [', 1)[0].strip() if isinstance(block[0], str) else ''
-        info["checkin_time"] = parts
+        if first is None:
+            first = l
+        key, value = _log_field(l.strip() if isinstance(l, str) else str(l).strip())
+        field = _DEVICE_INFO_FIELDS.get(key)
+        if field:
+            info[field] = value
+    if first is not None:
+        info["checkin_time"] = first.partition(' [')[0].strip() if isinstance(first, str) else ''
     return info
 
 
@@ -180,7 +399,7 @@ def extract_profile_list(block):
             capture = True
             continue
         if capture:
-            m = re.match(r".*\[([0-9]+)\]\s+([^\s]+)\s+\(([^)]+)\)\s+[–\-—]\s+(.+)", raw)
+            m = _PROFILE_RE.match(raw)
             if m:
                 profiles.append({
                     "PayloadIdentifier": m.group(2),
@@ -200,7 +419,7 @@ def extract_installed_apps(block):
             capture = True
             continue
         if capture:
-            m = re.match(r".*\[(\d+)\]\s+(.+?)\s+\((.+?)\)\s+v([^\s]+)", row)
+            m = _APP_RE.match(row)
             if m:
                 apps.append({
                     "Index": m.group(1),
@@ -214,82 +433,20 @@ def extract_installed_apps(block):
 def extract_system_report(block):
     """Extract extended device information for system report."""
     info = {}
+    first = None
     for l in block:
-        row = l.strip() if isinstance(l, str) else str(l).strip()
-
-        # Basic Info
-        field_map = {
-            "DeviceName:": "device_name",
-            "OSVersion:": "os_version",
-            "BuildVersion:": "build_version",
-            "ModelName:": "model_name",
-            "ProductName:": "product_name",
-            "SerialNumber:": "serial_number",
-            "WiFiMAC:": "wifi_mac",
-            "BluetoothMAC:": "bluetooth_mac",
-            "EthernetMAC:": "ethernet_mac",
-            "LocalHostName:": "local_hostname",
-            "CellularTechnology:": "cellular_technology",
-            "IMEI:": "imei",
-            "MEID:": "meid",
-            "ModemFirmwareVersion:": "modem_firmware",
-            "IsSupervised:": "is_supervised",
-            "SystemIntegrityProtectionEnabled:": "sip_enabled",
-            "IsActivationLockEnabled:": "activation_lock",
-            "IsDeviceLocatorServiceEnabled:": "find_my_enabled",
-            "IsCloudBackupEnabled:": "cloud_backup",
-            "IsMDMLostModeEnabled:": "mdm_lost_mode",
-            "IsDoNotDisturbInEffect:": "dnd_enabled",
-        }
-
-        for key, field in field_map.items():
-            if key in row:
-                info[field] = row.split(key, 1)[1].strip()
-
-        # Special handling for Model (avoid ModelName conflict)
-        if "Model:" in row and "ModelName:" not in row:
-            info["model"] = row.split("Model:", 1)[1].strip()
-
-        # Special handling for HostName
-        if "HostName:" in row and "LocalHostName:" not in row:
-            info["hostname"] = row.split("HostName:", 1)[1].strip()
-
-        # Storage - parse as GB
-        if "DeviceCapacity:" in row:
-            try:
-                capacity = float(row.split("DeviceCapacity:", 1)[1].strip())
-                if capacity > 1000:  # Probably bytes
-                    capacity = capacity / (1024**3)
-                info["device_capacity"] = f"{capacity:.2f} GB"
-            except:
-                info["device_capacity"] = row.split("DeviceCapacity:", 1)[1].strip()
-
-        if "AvailableDeviceCapacity:" in row:
-            try:
-                available = float(row.split("AvailableDeviceCapacity:", 1)[1].strip())
-                if available > 1000:
-                    available = available / (1024**3)
-                info["available_capacity"] = f"{available:.2f} GB"
-            except:
-                info["available_capacity"] = row.split("AvailableDeviceCapacity:", 1)[1].strip()
-
-        # Battery
-        if "BatteryLevel:" in row:
-            try:
-                battery = float(row.split("BatteryLevel:", 1)[1].strip())
-                if battery <= 1.0:
-                    battery = battery * 100
-                info["battery_level"] = f"{battery:.0f}%"
-            except:
-                info["battery_level"] = row.split("BatteryLevel:", 1)[1].strip()
-
-        if "Status:" in row:
-            info["status"] = row.split("Status:", 1)[1].strip()
-
-    if block and len(block) > 0:
-        first = block[0] if isinstance(block[0], str) else str(block[0])
-        parts = first.split(' [', 1)[0].strip()
-        info["checkin_time"] = parts
+        if first is None:
+            first = l if isinstance(l, str) else str(l)
+        key, value = _log_field(l.strip() if isinstance(l, str) else str(l).strip())
+        field = _SYSTEM_REPORT_FIELDS.get(key)
+        if field:
+            info[field] = value
+        elif key in _SYSTEM_REPORT_PARSED_FIELDS:
+            field, parse = _SYSTEM_REPORT_PARSED_FIELDS[key]
+            info[field] = parse(value)
+
+    if first is not None:
+        info["checkin_time"] = first.partition(' [')[0].strip()
 
     return info
 
@@ -298,47 +455,29 @@ def extract_security_info_detailed(block):
     """Extract detailed security information."""
     info = {}
     for line in block:
-        row = line.strip() if isinstance(line, str) else str(line).strip()
+        key, value = _log_field(line.strip() if isinstance(line, str) else str(line).strip())
 
-        # FileVault / FDE
-        if "FDE_Enabled:" in row:
-            info["filevault_enabled"] = row.split("FDE_Enabled:", 1)[1].strip()
-        if "FDE_HasPersonalRecoveryKey:" in row:
-            info["filevault_has_recovery_key"] = row.split("FDE_HasPersonalRecoveryKey:", 1)[1].strip()
-        if "FDE_HasInstitutionalRecoveryKey:" in row:
-            info["filevault_has_institutional_key"] = row.split("FDE_HasInstitutionalRecoveryKey:", 1)[1].strip()
+        # FileVault / FDE, remote desktop, SIP, bootstrap token, recovery lock
+        field = _SECURITY_FIELDS.get(key)
+        if field:
+            info[field] = value
 
         # Firewall
-        if "FirewallSettings:" in row:
-            if "'FirewallEnabled': True" in row:
-                info["firewall_enabled"] = "True"
-            elif "'FirewallEnabled': False" in row:
-                info["firewall_enabled"] = "False"
-            if "'BlockAllIncoming': True" in row:
-                info["firewall_block_all"] = "True"
-            elif "'BlockAllIncoming': False" in row:
-                info["firewall_block_all"] = "False"
-            if "'StealthMode': True" in row:
-                info["firewall_stealth"] = "True"
-            elif "'StealthMode': False" in row:
-                info["firewall_stealth"] = "False"
-
-        # Other security fields
-        if "RemoteDesktopEnabled:" in row:
-            info["remote_desktop_enabled"] = row.split("RemoteDesktopEnabled:", 1)[1].strip()
-        if "SystemIntegrityProtectionEnabled:" in row:
-            info["sip_enabled"] = row.split("SystemIntegrityProtectionEnabled:", 1)[1].strip()
-        if "SecureBootLevel:" in row or "'SecureBootLevel':" in row:
-            if "'full'" in row or "full" in row.lower():
-                info["secure_boot_level"] = "full"
-            elif "'medium'" in row or "medium" in row.lower():
-                info["secure_boot_level"] = "medium"
-            elif "'none'" in row or "none" in row.lower():
-                info["secure_boot_level"] = "none"
-        if "BootstrapTokenAllowedForAuthentication:" in row:
-            info["bootstrap_token_auth"] = row.split("BootstrapTokenAllowedForAuthentication:", 1)[1].strip()
-        if "IsRecoveryLockEnabled:" in row:
-            info["recovery_lock_enabled"] = row.split("IsRecoveryLockEnabled:", 1)[1].strip()
+        if key == "FirewallSettings":
+            settings = _literal_dict(value)
+            for name, field in _FIREWALL_FIELDS.items():
+                if isinstance(settings.get(name), bool):
+                    info[field] = str(settings[name])
+
+        # Secure boot level, logged on its own or inside SecureBoot dict
+        if key == "SecureBootLevel":
+            level = value
+        elif "'SecureBootLevel'" in value:
+            level = _literal_dict(value).get("SecureBootLevel")
+        else:
+            level = None
+        if isinstance(level, str) and level.strip("'").lower() in _SECURE_BOOT_LEVELS:
+            info["secure_boot_level"] = level.strip("'").lower()
 
     return info
 
@@ -529,7 +668,7 @@ def deviceinfo():
     result = executor.run('device_information', uuid)
 
     if not result.success or not result.command_uuid:
-        match = re.search(r'[a-f0-9\-]{36}', result.output)
+        match = _COMMAND_UUID_RE.search(result.output)
         command_uuid = match.group(0) if match else result.command_uuid
         if not command_uuid:
             return jsonify({"error": "No command_uuid found"}), 500
@@ -537,7 +676,7 @@ def deviceinfo():
         command_uuid = result.command_uuid
 
     block = universal_webhook_poll(command_uuid, "uuid", initial_sleep=3)
-    info = extract_device_info(block) if block else {}
+    info = extract_device_info(block)
 
     if not info:
         return jsonify({"error": "Device info not found"}), 404
@@ -562,13 +701,13 @@ def os_updates():
 
     command_uuid = result.command_uuid
     if not command_uuid:
-        match = re.search(r'[a-f0-9\-]{36}', result.output)
+        match = _COMMAND_UUID_RE.search(result.output)
         command_uuid = match.group(0) if match else None
     if not command_uuid:
         return jsonify({"error": "No command_uuid found"}), 500
 
     block = universal_webhook_poll(command_uuid, "uuid", initial_sleep=5)
-    updates = extract_os_updates(block) if block else []
+    updates = extract_os_updates(block)
 
     if updates:
         return jsonify(updates)
@@ -589,13 +728,13 @@ def installed_apps():
 
     command_uuid = result.command_uuid
     if not command_uuid:
-        match = re.search(r'[a-f0-9\-]{36}', result.output)
+        match = _COMMAND_UUID_RE.search(result.output)
         command_uuid = match.group(0) if match else None
     if not command_uuid:
         return jsonify({"error": "No command_uuid found"}), 500
 
     block = universal_webhook_poll(command_uuid, "uuid", initial_sleep=5)
-    apps = extract_installed_apps(block) if block else []
+    apps = extract_installed_apps(block)
 
     if apps:
         return jsonify(apps)
@@ -616,13 +755,13 @@ def profile_list():
 
     command_uuid = result.command_uuid
     if not command_uuid:
-        match = re.search(r'[a-f0-9\-]{36}', result.output)
+        match = _COMMAND_UUID_RE.search(result.output)
         command_uuid = match.group(0) if match else None
     if not command_uuid:
         return jsonify({"error": "No command_uuid found"}), 500
 
     block = universal_webhook_poll(command_uuid, "uuid", initial_sleep=5)
-    profiles = extract_profile_list(block) if block else []
+    profiles = extract_profile_list(block)
 
     if profiles:
         return jsonify(profiles)
@@ -731,13 +870,13 @@ def device_system_report_live():
 
     command_uuid = result.command_uuid
     if not command_uuid:
-        match = re.search(r'[a-f0-9\-]{36}', result.output)
+        match = _COMMAND_UUID_RE.search(result.output)
         command_uuid = match.group(0) if match else None
     if not command_uuid:
         return jsonify({"error": "No command_uuid found"}), 500
 
     block = universal_webhook_poll(command_uuid, "uuid", initial_sleep=5, max_polls=15, poll_wait=1)
-    system_info = extract_system_report(block) if block else {}
+    system_info = extract_system_report(block)
 
     if not system_info:
         return jsonify({"error": "No system report data received from device"}), 404
@@ -815,7 +954,7 @@ def device_system_report_full():
         return jsonify({"error": f"Failed to trigger system report: {result.error}"}), 500
 
     # Parse the two command UUIDs
-    match = re.search(r'([a-f0-9\-]{36})\|([a-f0-9\-]{36})', result.output)
+    match = _COMMAND_UUID_PAIR_RE.search(result.output)
     if not match:
         return jsonify({"error": "Failed to get command UUIDs"}), 500
 
@@ -824,11 +963,11 @@ def device_system_report_full():
 
     # Poll for DeviceInformation
     block_device = universal_webhook_poll(cmd_uuid_device, "uuid", initial_sleep=5, max_polls=12, poll_wait=2)
-    device_info = extract_device_info_detailed(block_device) if block_device else {}
+    device_info = extract_device_info_detailed(block_device)
 
     # Poll for SecurityInfo
     block_security = universal_webhook_poll(cmd_uuid_security, "uuid", initial_sleep=5, max_polls=10, poll_wait=2)
-    security_info = extract_security_info_detailed(block_security) if block_security else {}
+    security_info = extract_security_info_detailed(block_security)
 
     report = {
         "basic_info": {
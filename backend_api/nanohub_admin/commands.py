@@ -34,7 +34,7 @@ from db_utils import db, devices, required_profiles
 # Database config for shell commands (mysql CLI)
 DB_CONFIG = Config.DB
 
-from command_registry import COMMANDS_DIR, PROFILE_DIRS, get_command, check_role_permission
+from command_registry import COMMANDS_DIR, PROFILE_DIRS, get_command, get_required_params, check_role_permission
 from webhook_poller import poll_webhook_for_command
 
 from .core import (
@@ -312,6 +312,10 @@ def execute_command(cmd_id, params, user_info):
 
     # Default parameter handling
     else:
+        missing = get_required_params(cmd_id).difference(k for k, v in params.items() if v)
+        if missing:
+            return {'success': False, 'error': f'Missing required parameter: {", ".join(sorted(missing))}'}
+
         for param_def in cmd.get('parameters', []):
             param_name = param_def['name']
             param_value = params.get(param_name)
@@ -320,9 +324,6 @@ def execute_command(cmd_id, params, user_info):
             if not param_value and param_def.get('default'):
                 param_value = param_def['default']
 
-            if param_def.get('required') and not param_value:
-                return {'success': False, 'error': f'Missing required parameter: {param_name}'}
-
             if param_value:
                 # Handle 'devices' type - convert list to comma-separated string
                 if param_def['type'] == 'devices' and isinstance(param_value, list):
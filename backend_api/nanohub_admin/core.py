@@ -21,7 +21,7 @@ from datetime import datetime
 from config import Config
 from db_utils import db, devices, command_history, device_details, required_profiles, ddm_compliance
 from command_registry import get_available_profiles, get_command
-from cache_utils import device_cache
+from cache_utils import device_cache, json_loads
 
 # Logging
 logger = logging.getLogger('nanohub_admin')
@@ -755,11 +755,7 @@ def get_devices_list(manifest_filter=None):
         di.account,
         di.dep,
         e.max_last_seen as last_seen,
-        COALESCE(
-            JSON_UNQUOTE(JSON_EXTRACT(dd.hardware_data, '$.os_version')),
-            JSON_UNQUOTE(JSON_EXTRACT(dd.hardware_data, '$.OSVersion')),
-            ''
-        ) as os_version,
+        {device_details.os_version_sql} as os_version,
         CASE
             WHEN e.max_last_seen IS NULL THEN 'offline'
             WHEN TIMESTAMPDIFF(MINUTE, e.max_last_seen, NOW()) <= 15 THEN 'online'
@@ -791,6 +787,20 @@ def get_devices_list(manifest_filter=None):
         return []
 
 
+def _parse_ddm_data(ddm_data):
+    """Parse device_details.ddm_data into list of declaration statuses."""
+    if not ddm_data:
+        return []
+    if isinstance(ddm_data, bytes):
+        ddm_data = ddm_data.decode('utf-8')
+    if isinstance(ddm_data, str):
+        try:
+            return json_loads(ddm_data)
+        except:
+            return []
+    return ddm_data if isinstance(ddm_data, list) else []
+
+
 def get_devices_full(manifest_filter=None, search_term=None):
     """Get full device list with all fields for standard device table format."""
     # Build WHERE clause
@@ -831,7 +841,15 @@ def get_devices_full(manifest_filter=None, search_term=None):
             ORDER BY di.hostname
         """)
 
-        for row in rows or []:
+        rows = rows or []
+        # DDM compliance check (always from DB, not cached - DDM data changes frequently),
+        # required sets are loaded once for the whole list
+        ddm_checks = ddm_compliance.check_devices_ddm_bulk([
+            (row.get('manifest', '') or '', (row.get('os') or '').lower(), _parse_ddm_data(row.get('ddm_data')))
+            for row in rows
+        ])
+
+        for row, ddm_check in zip(rows, ddm_checks):
             device_uuid = row.get('uuid', '')
             os_type = (row.get('os') or '').lower()
             manifest = row.get('manifest', '') or ''
@@ -839,21 +857,6 @@ def get_devices_full(manifest_filter=None, search_term=None):
             # Try to get processed data from cache
             cached = device_cache.get(device_uuid)
 
-            # DDM compliance check (always from DB, not cached - DDM data changes frequently)
-            ddm_data = row.get('ddm_data')
-            if ddm_data:
-                if isinstance(ddm_data, bytes):
-                    ddm_data = ddm_data.decode('utf-8')
-                if isinstance(ddm_data, str):
-                    try:
-                        ddm_data = json.loads(ddm_data)
-                    except:
-                        ddm_data = []
-                elif not isinstance(ddm_data, list):
-                    ddm_data = []
-            else:
-                ddm_data = []
-            ddm_check = ddm_compliance.check_device_ddm(manifest, os_type, ddm_data)
 
             if cached:
                 os_ver = cached.get('os_version', '-')
@@ -867,21 +870,21 @@ def get_devices_full(manifest_filter=None, search_term=None):
                 # Parse JSON and process data
                 hw = row.get('hardware_data')
                 if hw and isinstance(hw, str):
-                    try: hw = json.loads(hw)
+                    try: hw = json_loads(hw)
                     except Exception: hw = {}
                 elif not hw:
                     hw = {}
 
                 sec = row.get('security_data')
                 if sec and isinstance(sec, str):
-                    try: sec = json.loads(sec)
+                    try: sec = json_loads(sec)
                     except Exception: sec = {}
                 elif not sec:
                     sec = {}
 
                 profiles = row.get('profiles_data')
                 if profiles and isinstance(profiles, str):
-                    try: profiles = json.loads(profiles)
+                    try: profiles = json_loads(profiles)
                     except Exception: profiles = []
                 if not profiles:
                     profiles = []
@@ -989,11 +992,7 @@ def search_devices(field, value, manifest_filter=None):
         di.account,
         di.dep,
         e.max_last_seen as last_seen,
-        COALESCE(
-            JSON_UNQUOTE(JSON_EXTRACT(dd.hardware_data, '$.os_version')),
-            JSON_UNQUOTE(JSON_EXTRACT(dd.hardware_data, '$.OSVersion')),
-            ''
-        ) as os_version,
+        {device_details.os_version_sql} as os_version,
         CASE
             WHEN e.max_last_seen IS NULL THEN 'offline'
             WHEN TIMESTAMPDIFF(MINUTE, e.max_last_seen, NOW()) <= 15 THEN 'online'
@@ -1117,7 +1116,6 @@ def audit_log(user, action, command, params, result, success, execution_time_ms=
             logger.error(f"Failed to write to command_history: {db_err}")
 
         # Also write to file (backup)
-        from datetime import datetime
         os.makedirs(os.path.dirname(AUDIT_LOG_PATH), exist_ok=True)
         timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
 
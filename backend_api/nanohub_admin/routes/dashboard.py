@@ -6,18 +6,19 @@ Provides:
 - / - Admin dashboard (command categories)
 - /command/<cmd_id> - Command execution page
 - /execute - Execute command (POST)
-- /api/commands - Get all commands (JSON)
+- /api/commands - Get all commands (JSON, ?os=macos|ios)
+- /api/commands/<cmd_id>/info - Get command help text (JSON)
 """
 
-import copy
 import json
 import logging
 import time
 
-from flask import Blueprint, render_template_string, session, redirect, url_for, request, jsonify
+from flask import Blueprint, render_template_string, session, redirect, url_for, request, jsonify, Response
 
 from command_registry import (
-    COMMANDS, get_commands_by_category, get_command, check_role_permission
+    get_commands_by_category, get_command, get_command_info, get_commands_json,
+    get_commands_etag, check_role_permission, thaw, OS_FILTERS
 )
 from nanohub_admin.utils import login_required_admin
 from db_utils import db
@@ -1184,7 +1185,7 @@ def admin_command(cmd_id):
         '''), 403
 
     # Refresh manifest options from DB for commands with manifest parameter
-    command = copy.deepcopy(command)  # Don't modify cached command
+    command = thaw(command)  # Registry is read-only, work on a mutable copy
     manifest_filter = user.get('manifest_filter')
     fresh_manifests = get_manifests_list(manifest_filter)
     for param in command.get('parameters', []):
@@ -1297,13 +1298,30 @@ def admin_job(job_id):
 @dashboard_bp.route('/api/commands')
 @login_required_admin
 def api_commands():
-    """Get all commands (JSON)"""
+    """Get all commands (JSON), optionally limited to one platform (?os=macos|ios)"""
     user = session.get('user', {})
     user_role = user.get('role', 'report')
+    os_filter = request.args.get('os', '').lower() or None
+    if os_filter not in OS_FILTERS:
+        return jsonify({'success': False, 'error': f'Invalid OS filter: {os_filter}'}), 400
 
-    available_commands = {}
-    for cmd_id, cmd in COMMANDS.items():
-        if check_role_permission(user_role, cmd.get('min_role', 'admin')):
-            available_commands[cmd_id] = cmd
+    # Registry is static between reloads - payload is serialized once per role/OS,
+    # browsers revalidate with If-None-Match and get 304 while it is unchanged
+    response = Response(get_commands_json(user_role, os_filter), mimetype='application/json')
+    response.set_etag(get_commands_etag(user_role, os_filter))
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response.make_conditional(request)
 
-    return jsonify(available_commands)
+
+@dashboard_bp.route('/api/commands/<cmd_id>/info')
+@login_required_admin
+def api_command_info(cmd_id):
+    """Get command help text (loaded on demand, not part of /api/commands)"""
+    user = session.get('user', {})
+    command = get_command(cmd_id)
+    if not command:
+        return jsonify({'success': False, 'error': 'Unknown command'}), 404
+    if not check_role_permission(user.get('role', 'report'), command.get('min_role', 'admin')):
+        return jsonify({'success': False, 'error': 'Insufficient permissions'}), 403
+
+    return jsonify({'success': True, 'info_text': get_command_info(cmd_id)})
@@ -15,7 +15,7 @@ from datetime import datetime
 from flask import Blueprint, render_template_string, session, request, jsonify
 
 from config import Config
-from db_utils import db, app_settings
+from db_utils import db, app_settings, ddm_compliance
 from nanohub_admin.utils import login_required_admin
 
 logger = logging.getLogger('nanohub_admin')
@@ -1042,6 +1042,7 @@ def api_ddm_declarations_create():
             VALUES (%s, %s, %s)
             ON DUPLICATE KEY UPDATE type = VALUES(type), payload = VALUES(payload), updated_at = NOW()
         """, (identifier, decl_type, payload_str))
+        ddm_compliance.invalidate_cache()
 
         # Auto-upload to KMFDDM server
         success, error, server_token = upload_declaration_to_kmfddm(identifier, decl_type, payload_dict)
@@ -1080,6 +1081,7 @@ def api_ddm_declarations_delete(decl_id):
 
         # Delete from local DB
         db.execute("DELETE FROM ddm_declarations WHERE id = %s", (decl_id,))
+        ddm_compliance.invalidate_cache()
 
         # Remove local JSON file
         delete_declaration_json(identifier)
@@ -1179,6 +1181,8 @@ def api_ddm_declarations_import():
                     upload_errors.append(f"{identifier}: {error}")
 
                 imported += 1
+        if imported:
+            ddm_compliance.invalidate_cache()
 
         result = {'success': True, 'imported': imported}
         if upload_errors:
@@ -1313,6 +1317,7 @@ def api_ddm_sets_update(set_id):
         db.execute("DELETE FROM ddm_set_declarations WHERE set_id = %s", (set_id,))
         for decl_id in declaration_ids:
             db.execute("INSERT INTO ddm_set_declarations (set_id, declaration_id) VALUES (%s, %s)", (set_id, decl_id))
+        ddm_compliance.invalidate_cache()
 
         # Get new declaration identifiers
         new_declaration_identifiers = []
@@ -1367,6 +1372,7 @@ def api_ddm_sets_delete(set_id):
 
         # Delete from local DB
         db.execute("DELETE FROM ddm_sets WHERE id = %s", (set_id,))
+        ddm_compliance.invalidate_cache()
 
         return jsonify({'success': True})
     except Exception as e:
@@ -1474,6 +1480,7 @@ def api_ddm_required_create():
             INSERT IGNORE INTO ddm_required_sets (manifest, os, set_id)
             VALUES (%s, %s, %s)
         """, (manifest, os_type, set_id))
+        ddm_compliance.invalidate_cache()
 
         return jsonify({'success': True})
     except Exception as e:
@@ -1487,6 +1494,7 @@ def api_ddm_required_delete(req_id):
     """Remove a required DDM set"""
     try:
         db.execute("DELETE FROM ddm_required_sets WHERE id = %s", (req_id,))
+        ddm_compliance.invalidate_cache()
         return jsonify({'success': True})
     except Exception as e:
         logger.error(f"Failed to delete required DDM set: {e}")
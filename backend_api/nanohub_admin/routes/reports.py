@@ -102,7 +102,7 @@ def get_enrollment_type(dep_value, security_data):
     # Manual enrollment
     return 'Manual (User Approved)' if is_user_approved else 'Manual (Not Approved)'
 from db_utils import db, required_profiles, ddm_compliance, command_history, devices
-from cache_utils import device_cache
+from cache_utils import device_cache, json_loads
 
 logger = logging.getLogger('nanohub_admin')
 
@@ -200,21 +200,21 @@ def admin_reports():
                 # Parse JSON and process data
                 hw = row.get('hardware_data')
                 if hw and isinstance(hw, str):
-                    try: hw = json.loads(hw)
+                    try: hw = json_loads(hw)
                     except: hw = {}
                 elif not hw:
                     hw = {}
 
                 sec = row.get('security_data')
                 if sec and isinstance(sec, str):
-                    try: sec = json.loads(sec)
+                    try: sec = json_loads(sec)
                     except: sec = {}
                 elif not sec:
                     sec = {}
 
                 profiles = row.get('profiles_data')
                 if profiles and isinstance(profiles, str):
-                    try: profiles = json.loads(profiles)
+                    try: profiles = json_loads(profiles)
                     except: profiles = []
                 if not profiles:
                     profiles = []
@@ -226,7 +226,7 @@ def admin_reports():
                         ddm_data = ddm_data.decode('utf-8')
                     if isinstance(ddm_data, str):
                         try:
-                            ddm_data = json.loads(ddm_data)
+                            ddm_data = json_loads(ddm_data)
                         except:
                             ddm_data = []
                     elif not isinstance(ddm_data, list):
@@ -473,21 +473,21 @@ def api_reports_data():
                 # Parse JSON and process data
                 hw = row.get('hardware_data')
                 if hw and isinstance(hw, str):
-                    try: hw = json.loads(hw)
+                    try: hw = json_loads(hw)
                     except: hw = {}
                 elif not hw:
                     hw = {}
 
                 sec = row.get('security_data')
                 if sec and isinstance(sec, str):
-                    try: sec = json.loads(sec)
+                    try: sec = json_loads(sec)
                     except: sec = {}
                 elif not sec:
                     sec = {}
 
                 profiles = row.get('profiles_data')
                 if profiles and isinstance(profiles, str):
-                    try: profiles = json.loads(profiles)
+                    try: profiles = json_loads(profiles)
                     except: profiles = []
                 if not profiles:
                     profiles = []
@@ -497,7 +497,7 @@ def api_reports_data():
                     if isinstance(ddm_data, bytes):
                         ddm_data = ddm_data.decode('utf-8')
                     if isinstance(ddm_data, str):
-                        try: ddm_data = json.loads(ddm_data)
+                        try: ddm_data = json_loads(ddm_data)
                         except: ddm_data = []
                     elif not isinstance(ddm_data, list):
                         ddm_data = []
@@ -1875,8 +1875,8 @@ def report_devices_all():
 
     data = []
     try:
-        device_list = devices.get_all(manifest_filter)
-        for d in device_list:
+        # Streamed - only the report columns are kept, not every full device row
+        for d in devices.get_all(manifest_filter, stream=True):
             if os_filter and d.get('os', '').lower() != os_filter.lower():
                 continue
 
@@ -17,7 +17,7 @@ from flask import Blueprint, render_template_string, session, request, jsonify,
 from werkzeug.utils import secure_filename
 
 from config import Config
-from db_utils import db, app_settings
+from db_utils import db, app_settings, required_profiles, command_history
 from nanohub_admin.utils import login_required_admin
 
 logger = logging.getLogger('nanohub_admin')
@@ -1277,6 +1277,7 @@ def api_settings_rename_manifest():
         db.execute("UPDATE device_inventory SET manifest = %s WHERE manifest = %s", (new_name, old_name))
         # Rename manifest in required_profiles
         db.execute("UPDATE required_profiles SET manifest = %s WHERE manifest = %s", (new_name, old_name))
+        required_profiles.invalidate_cache()
         return jsonify({'success': True})
     except Exception as e:
         logger.error(f"Failed to rename manifest: {e}")
@@ -1298,6 +1299,7 @@ def api_settings_delete_manifest(name):
         db.execute("UPDATE device_inventory SET manifest = NULL WHERE manifest = %s", (name,))
         # Delete required profiles for this manifest
         db.execute("DELETE FROM required_profiles WHERE manifest = %s", (name,))
+        required_profiles.invalidate_cache()
         return jsonify({'success': True})
     except Exception as e:
         logger.error(f"Failed to remove manifest: {e}")
@@ -1359,11 +1361,7 @@ def api_settings_audit_cleanup():
     retention_days = int(retention_value) if retention_value else 90
 
     try:
-        result = db.execute(
-            "DELETE FROM command_history WHERE timestamp < DATE_SUB(NOW(), INTERVAL %s DAY)",
-            (retention_days,)
-        )
-        deleted = result.rowcount if hasattr(result, 'rowcount') else 0
+        deleted = command_history.cleanup(retention_days)
         return jsonify({'success': True, 'deleted': deleted, 'retention_days': retention_days})
     except Exception as e:
         logger.error(f"Failed to cleanup audit logs: {e}")
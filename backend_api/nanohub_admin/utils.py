@@ -6,6 +6,7 @@ Common functions used across all admin modules.
 
 import os
 import json
+import fnmatch
 import logging
 from datetime import datetime
 from functools import wraps
@@ -90,7 +91,6 @@ def validate_device_access(uuid_val, user_info):
         return False  # Device not found
 
     # Convert SQL LIKE pattern to fnmatch pattern
-    import fnmatch
     pattern = manifest_filter.replace('%', '*')
     return fnmatch.fnmatch(device_manifest, pattern)
 
@@ -100,7 +100,6 @@ def filter_devices_by_manifest(devices_list, manifest_filter):
     if not manifest_filter:
         return devices_list
 
-    import fnmatch
     pattern = manifest_filter.replace('%', '*')
     return [d for d in devices_list if fnmatch.fnmatch(d.get('manifest', ''), pattern)]
 
@@ -10,6 +10,7 @@ from functools import wraps
 from flask import session, redirect, url_for, request, render_template_string, flash
 import logging
 import hashlib
+import hmac
 import os
 import secrets
 
@@ -293,7 +294,7 @@ def local_authenticate(username, password):
     if username in EMERGENCY_FALLBACK_USER:
         fallback = EMERGENCY_FALLBACK_USER[username]
         password_hash = hashlib.sha256(f'{username}:{password}:nanohub-salt'.encode()).hexdigest()
-        if password_hash == fallback['password_hash']:
+        if hmac.compare_digest(password_hash, fallback['password_hash']):
             user_info = {
                 'username': username,
                 'display_name': fallback.get('display_name', username),
@@ -0,0 +1,27 @@
+-- NanoHUB migration 001: index for per-device last check-in, drop last_seen triggers
+--
+-- Device listings (DeviceDB, nanohub_admin core/reports) aggregate
+-- MAX(enrollments.last_seen_at) per device_id. This index lets MySQL answer
+-- that GROUP BY with a loose index scan instead of reading every enrollment.
+--
+-- enrollments belongs to NanoMDM - run explicitly during a maintenance window:
+--   mysql -h localhost -u nanohub -p nanohub < 001_enrollments_last_seen_index.sql
+--
+-- Safe to re-run (skips when the index exists).
+
+-- Triggers installed by earlier dashboard versions kept device_inventory.last_seen_at
+-- in sync on every check-in; a failing trigger would fail NanoMDM's write.
+DROP TRIGGER IF EXISTS trg_enrollments_last_seen_ins;
+DROP TRIGGER IF EXISTS trg_enrollments_last_seen_upd;
+
+SET @exists = (
+    SELECT COUNT(*) FROM information_schema.STATISTICS
+    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'enrollments'
+      AND INDEX_NAME = 'idx_device_last_seen'
+);
+SET @sql = IF(@exists = 0,
+    'ALTER TABLE enrollments ADD INDEX idx_device_last_seen (device_id, last_seen_at)',
+    'SELECT ''idx_device_last_seen already exists''');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
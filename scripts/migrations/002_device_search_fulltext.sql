@@ -0,0 +1,51 @@
+-- NanoHUB migration 002: ngram FULLTEXT indexes for device search
+--
+-- DeviceDB.search matches uuid/serial/hostname substrings (3+ characters)
+-- through these indexes and verifies hits with LIKE. The dashboard only
+-- checks for them at startup; without them search uses LIKE scans.
+--
+-- The first FULLTEXT index rebuilds device_inventory and blocks writes
+-- meanwhile - run explicitly during a maintenance window:
+--   mysql -h localhost -u nanohub -p nanohub < 002_device_search_fulltext.sql
+--
+-- Safe to re-run (skips existing indexes).
+
+-- Stopwords would drop every ngram token containing e.g. 'a' or 'i'
+-- (this session only)
+SET SESSION innodb_ft_enable_stopword = OFF;
+
+SET @exists = (
+    SELECT COUNT(*) FROM information_schema.STATISTICS
+    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'device_inventory'
+      AND INDEX_NAME = 'ft_search_uuid'
+);
+SET @sql = IF(@exists = 0,
+    'ALTER TABLE device_inventory ADD FULLTEXT INDEX ft_search_uuid (uuid) WITH PARSER ngram',
+    'SELECT ''ft_search_uuid already exists''');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+SET @exists = (
+    SELECT COUNT(*) FROM information_schema.STATISTICS
+    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'device_inventory'
+      AND INDEX_NAME = 'ft_search_serial'
+);
+SET @sql = IF(@exists = 0,
+    'ALTER TABLE device_inventory ADD FULLTEXT INDEX ft_search_serial (serial) WITH PARSER ngram',
+    'SELECT ''ft_search_serial already exists''');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+SET @exists = (
+    SELECT COUNT(*) FROM information_schema.STATISTICS
+    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'device_inventory'
+      AND INDEX_NAME = 'ft_search_hostname'
+);
+SET @sql = IF(@exists = 0,
+    'ALTER TABLE device_inventory ADD FULLTEXT INDEX ft_search_hostname (hostname) WITH PARSER ngram',
+    'SELECT ''ft_search_hostname already exists''');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
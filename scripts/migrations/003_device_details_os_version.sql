@@ -0,0 +1,27 @@
+-- NanoHUB migration 003: indexed os_version generated column on device_details
+--
+-- Device listings read os_version from this small stored column instead of
+-- extracting it from every hardware_data document. The dashboard only checks
+-- for the column at startup; without it listings use JSON_EXTRACT.
+--
+-- A STORED generated column rebuilds device_details and blocks writes
+-- (webhook updates) meanwhile - run explicitly during a maintenance window:
+--   mysql -h localhost -u nanohub -p nanohub < 003_device_details_os_version.sql
+--
+-- Safe to re-run (skips an existing column).
+
+SET @exists = (
+    SELECT COUNT(*) FROM information_schema.COLUMNS
+    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'device_details'
+      AND COLUMN_NAME = 'os_version'
+);
+SET @sql = IF(@exists = 0,
+    'ALTER TABLE device_details
+        ADD COLUMN os_version VARCHAR(255) GENERATED ALWAYS AS (COALESCE(
+            JSON_UNQUOTE(JSON_EXTRACT(hardware_data, ''$.os_version'')),
+            JSON_UNQUOTE(JSON_EXTRACT(hardware_data, ''$.OSVersion'')))) STORED,
+        ADD INDEX idx_os_version (os_version)',
+    'SELECT ''os_version already exists''');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
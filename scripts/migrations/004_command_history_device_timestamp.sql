@@ -0,0 +1,23 @@
+-- NanoHUB migration 004: (device_udid, timestamp) index on command_history
+--
+-- Device history (WHERE device_udid = ? ORDER BY timestamp DESC LIMIT n)
+-- reads this index in order instead of sorting all rows of the device.
+-- Without it the query still works through idx_device_udid.
+--
+-- command_history grows with every executed command - run explicitly,
+-- preferably outside working hours:
+--   mysql -h localhost -u nanohub -p nanohub < 004_command_history_device_timestamp.sql
+--
+-- Safe to re-run (skips an existing index).
+
+SET @exists = (
+    SELECT COUNT(*) FROM information_schema.STATISTICS
+    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'command_history'
+      AND INDEX_NAME = 'idx_device_timestamp'
+);
+SET @sql = IF(@exists = 0,
+    'ALTER TABLE command_history ADD INDEX idx_device_timestamp (device_udid, timestamp)',
+    'SELECT ''idx_device_timestamp already exists''');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
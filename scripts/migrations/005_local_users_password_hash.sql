@@ -0,0 +1,21 @@
+-- NanoHUB migration 005: widen local_users.password_hash to VARCHAR(255)
+--
+-- Tables created for 64-char SHA256 hashes cannot hold argon2id/scrypt
+-- strings. Until this runs, the dashboard keeps verifying legacy hashes but
+-- skips upgrading them on login (checked at startup).
+--
+--   mysql -h localhost -u nanohub -p nanohub < 005_local_users_password_hash.sql
+--
+-- Safe to re-run (skips a column that is already wide enough).
+
+SET @length = (
+    SELECT CHARACTER_MAXIMUM_LENGTH FROM information_schema.COLUMNS
+    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'local_users'
+      AND COLUMN_NAME = 'password_hash'
+);
+SET @sql = IF(@length < 255,
+    'ALTER TABLE local_users MODIFY password_hash VARCHAR(255) NOT NULL',
+    'SELECT ''password_hash already VARCHAR(255) or local_users missing''');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;